@@ -0,0 +1,234 @@
+"""Response cache for read-mostly API endpoints, keyed by the data generation."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from api.pagination import NEXT_CURSOR_HEADER, Page
+from shared.config import settings
+from shared.metrics import CACHE_LOOKUPS
+
+
+class LRUBackend:
+    """Bounded in-process cache of serialized responses."""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared cache so several API workers reuse each other's responses."""
+    
+    def __init__(self, url: str, prefix: str = "repoboard:api:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("redis package required for API_CACHE_REDIS_URL. Install with: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+    
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+
+def read_generation() -> int:
+    """Read the current data generation from the database."""
+    from db.connection import SessionLocal
+    from db.generation import get_generation
+    
+    db = SessionLocal()
+    try:
+        return get_generation(db)
+    finally:
+        db.close()
+
+
+class _Flight:
+    """One in-progress build that concurrent requests for the same key wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[bytes] = None
+
+
+class ResponseCache:
+    """
+    Two-tier response cache (in-process LRU, then an optional shared backend).
+
+    Entries are keyed by the data generation, which writers bump in the same
+    transaction as their changes, so a regeneration makes every older entry
+    unreachable instead of needing explicit invalidation. The generation is
+    re-read at most every ``poll_seconds``, which bounds staleness after a
+    commit from another process.
+
+    Concurrent misses for the same key in one process share a single build
+    (single flight). While it runs, the other requests get the previous
+    generation's entry if the generation moved less than ``stale_seconds``
+    ago (stale-while-revalidate), and otherwise wait for the build.
+    """
+    
+    def __init__(
+        self,
+        local: Optional[LRUBackend] = None,
+        shared: Optional[Any] = None,
+        generation_reader: Callable[[], int] = read_generation,
+        poll_seconds: Optional[float] = None,
+        ttl: Optional[int] = None,
+        stale_seconds: Optional[float] = None,
+        flight_timeout: Optional[float] = None,
+    ):
+        self.local = local or LRUBackend(settings.api_cache_max_entries)
+        self.shared = shared
+        self.generation_reader = generation_reader
+        self.poll_seconds = settings.api_cache_generation_poll_seconds if poll_seconds is None else poll_seconds
+        self.ttl = ttl or settings.api_cache_ttl_seconds
+        self.stale_seconds = settings.api_cache_stale_seconds if stale_seconds is None else stale_seconds
+        self.flight_timeout = settings.api_cache_flight_timeout_seconds if flight_timeout is None else flight_timeout
+        self._generation: Optional[int] = None
+        self._generation_checked = 0.0
+        self._previous_generation: Optional[int] = None
+        self._generation_changed = 0.0
+        self._lock = threading.Lock()
+        # Latest (generation, entry) per key, for stale-while-revalidate
+        self._latest = LRUBackend(self.local.max_entries)
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+    
+    def generation(self) -> int:
+        """Current data generation, refreshed at most every poll_seconds."""
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_checked >= self.poll_seconds:
+            with self._lock:
+                if self._generation is None or now - self._generation_checked >= self.poll_seconds:
+                    generation = self.generation_reader()
+                    if self._generation is not None and generation != self._generation:
+                        self._previous_generation = self._generation
+                        self._generation_changed = now
+                    self._generation = generation
+                    self._generation_checked = now
+        return self._generation
+    
+    def generation_is_current(self) -> bool:
+        """Whether generation() would return without reading the database."""
+        return self._generation is not None and time.monotonic() - self._generation_checked < self.poll_seconds
+    
+    def invalidate(self) -> None:
+        """Force the next lookup to re-read the generation."""
+        self._generation_checked = float("-inf")
+    
+    def get_or_build(self, key: str, build: Callable[[], Any]) -> Response:
+        """
+        Serve the cached JSON body for key, building and storing it on a miss.
+        A Page result is stored as its next cursor, a newline, then the items.
+        The response's ETag names the generation the body was built from.
+        """
+        generation = self.generation()
+        full_key = f"{generation}:{key}"
+        entry = self._lookup(full_key)
+        if entry is None:
+            generation, entry = self._coalesced_build(key, generation, build)
+        cursor, _, body = entry.partition(b"\n")
+        response = Response(content=body, media_type="application/json")
+        response.headers["ETag"] = f'"{generation}"'
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor.decode("ascii")
+        return response
+    
+    def _lookup(self, full_key: str) -> Optional[bytes]:
+        entry = self.local.get(full_key)
+        if entry is not None:
+            CACHE_LOOKUPS.inc(cache="response", result="hit")
+        elif self.shared is not None:
+            entry = self.shared.get(full_key)
+            if entry is not None:
+                CACHE_LOOKUPS.inc(cache="response", result="shared_hit")
+                self.local.set(full_key, entry, self.ttl)
+        return entry
+    
+    def _stale(self, key: str) -> Optional[Tuple[int, bytes]]:
+        """The previous generation's entry for key, while it may still be served."""
+        latest = self._latest.get(key)
+        if latest is None or time.monotonic() - self._generation_changed > self.stale_seconds:
+            return None
+        generation, _, entry = latest.partition(b":")
+        if int(generation) != self._previous_generation:
+            return None
+        return int(generation), entry
+    
+    def _coalesced_build(self, key: str, generation: int, build: Callable[[], Any]) -> Tuple[int, bytes]:
+        full_key = f"{generation}:{key}"
+        with self._flights_lock:
+            flight = self._flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full_key] = _Flight()
+        
+        if not leader:
+            stale = self._stale(key)
+            if stale is not None:
+                CACHE_LOOKUPS.inc(cache="response", result="stale")
+                return stale
+            if flight.done.wait(self.flight_timeout) and flight.entry is not None:
+                CACHE_LOOKUPS.inc(cache="response", result="coalesced")
+                return generation, flight.entry
+            # The leader failed or is too slow; build independently
+            return generation, self._build(key, generation, build)
+        
+        try:
+            # Another flight may have stored it between the lookup and taking the lead
+            flight.entry = self._lookup(full_key) or self._build(key, generation, build)
+            return generation, flight.entry
+        finally:
+            with self._flights_lock:
+                self._flights.pop(full_key, None)
+            flight.done.set()
+    
+    def _build(self, key: str, generation: int, build: Callable[[], Any]) -> bytes:
+        CACHE_LOOKUPS.inc(cache="response", result="miss")
+        result = build()
+        cursor = b""
+        if isinstance(result, Page):
+            cursor = (result.next_cursor or "").encode("ascii")
+            result = result.items
+        body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+        entry = cursor + b"\n" + body
+        full_key = f"{generation}:{key}"
+        self.local.set(full_key, entry, self.ttl)
+        if self.shared is not None:
+            self.shared.set(full_key, entry, self.ttl)
+        self._latest.set(key, f"{generation}:".encode("ascii") + entry, self.ttl)
+        return entry
+
+
+def create_response_cache() -> ResponseCache:
+    """Build the API cache from settings."""
+    shared = RedisBackend(settings.api_cache_redis_url) if settings.api_cache_redis_url else None
+    return ResponseCache(shared=shared)
@@ -0,0 +1,183 @@
+"""HTTP caching (ETag, Cache-Control) and compression middleware for the API."""
+
+import gzip
+from typing import Dict, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.cache import ResponseCache
+from api.metrics import route_path
+from shared.config import settings
+from shared.metrics import CACHE_LOOKUPS
+
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip
+    brotli = None
+
+
+class CachePolicy(NamedTuple):
+    """
+    Client cache lifetime for a route, and whether its ETag follows the data
+    generation. A max_age of 0 sends no-cache: clients and CDNs may store the
+    response but revalidate it on every use, which costs a 304 while the
+    generation is unchanged.
+    """
+    max_age: int = 0
+    etag: bool = True
+    
+    @property
+    def cache_control(self) -> str:
+        if not self.max_age:
+            return "public, no-cache"
+        return f"public, max-age={self.max_age}"
+
+
+def matching_etag(if_none_match: Optional[str], generation: int) -> Optional[str]:
+    """
+    The If-None-Match entry naming this generation, in any content coding
+    (see CompressionMiddleware), or None when the client copy is outdated.
+    """
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return f'"{generation}"'
+        opaque = tag[2:] if tag.startswith("W/") else tag
+        if opaque.strip('"').partition("-")[0] == str(generation):
+            return opaque
+    return None
+
+
+class HTTPCacheMiddleware:
+    """
+    Adds Cache-Control and a strong ETag to GET responses of routes with a
+    CachePolicy. The ETag is the data generation, which writers bump with
+    every change, so a matching If-None-Match is answered with 304 before the
+    route runs. Between polls the generation is held in memory (see
+    ResponseCache.generation), so revalidation costs no database query.
+    """
+    
+    def __init__(self, app: ASGIApp, router: Router, policies: Dict[str, CachePolicy], cache: ResponseCache):
+        self.app = app
+        self.router = router
+        self.policies = policies
+        self.cache = cache
+    
+    def _policy(self, scope: Scope) -> Optional[CachePolicy]:
+        return self.policies.get(route_path(self.router, scope))
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        policy = self._policy(scope) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        
+        cache_headers = {"cache-control": policy.cache_control}
+        if policy.etag:
+            if self.cache.generation_is_current():
+                generation = self.cache.generation()
+            else:
+                generation = await run_in_threadpool(self.cache.generation)
+            if_none_match = Headers(scope=scope).get("if-none-match")
+            matched = matching_etag(if_none_match, generation)
+            if if_none_match:
+                CACHE_LOOKUPS.inc(cache="http", result="not_modified" if matched else "modified")
+            if matched:
+                headers = MutableHeaders(raw=[])
+                headers.update({**cache_headers, "etag": matched})
+                headers.add_vary_header("Accept-Encoding")
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            cache_headers["etag"] = f'"{generation}"'
+        
+        async def send_with_cache_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(raw=message["headers"])
+                for name, value in cache_headers.items():
+                    # Cached responses carry the generation they were built from
+                    headers.setdefault(name, value)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cache_headers)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred content coding the client accepts: brotli when available, else gzip."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.api_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.api_gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least minimum_size bytes. API responses
+    are sent as a single body message, so the body is buffered and compressed
+    in one call. The coding is appended to the ETag, giving each
+    representation its own strong validator.
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.api_compression_min_bytes if minimum_size is None else minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start: Optional[Message] = None
+        chunks = []
+        
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) >= self.minimum_size and "content-encoding" not in headers:
+                body = compress(body, encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and etag.endswith('"'):
+                    headers["etag"] = f'{etag[:-1]}-{encoding}"'
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            start = None
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_compressed)
@@ -2,18 +2,34 @@
 
 import sys
 import os
-from typing import List, Optional
-from fastapi import FastAPI, Depends, HTTPException, Query
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+
+import anyio
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, Float
+from sqlalchemy.orm import Session, undefer, joinedload, selectinload, contains_eager, aliased, load_only
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.cache import create_response_cache
+from api.http_cache import CachePolicy, CompressionMiddleware, HTTPCacheMiddleware
+from api.metrics import MetricsMiddleware
+from api.pagination import NEXT_CURSOR_HEADER, Page, paginate, paginate_ranked
+from api.projection import Projection, parse_projection
 from db.connection import get_db_session, SessionLocal
-from db.models import Repo, RepoSummary, Board, BoardItem, CurationScore
+from db.models import Repo, RepoSummary, Board, BoardItem, CurationScore, RepoNeighbor
+from db.search import SEARCH_CONFIG, FallbackSearchIndex, uses_tsvector
+from db.stats import read_stats
+from shared.file_tree import file_tree_to_nested
+from shared.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS_REGISTRY
 from shared.schemas import (
     RepoMetadata, RepoSummary as RepoSummarySchema, Board as BoardSchema,
-    BoardWithRepos, RepoWithSummary
+    BoardWithRepos, RepoWithSummary, SemanticSearchResult, SimilarRepo,
+    RepoCardWithSummary, BoardWithRepoCards
 )
 
 # For Pydantic v2 compatibility
@@ -24,12 +40,51 @@ except ImportError:
     PYDANTIC_V2 = False
 from shared.config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Size the threadpool that runs the (sync) DB-bound handlers to the
+    connection pool, so a worker serves as many queries at once as it has
+    connections and never blocks the event loop on a query.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.api_db_threads or (settings.db_pool_size + settings.db_max_overflow)
+    yield
+
+
 app = FastAPI(
     title="RepoBoard API",
     description="API for GitHub repository curation and boards",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Boards and stats only change when ingestion or board generation commits
+response_cache = create_response_cache()
+# In-process search index for databases without tsvector (SQLite, tests)
+fallback_search_index = FallbackSearchIndex()
+
+# Client caching per route. ETag routes are revalidated on every use, so a
+# write shows up on the next request; semantic search has no ETag (results
+# also depend on the vector DB) and is cached briefly instead
+HTTP_CACHE_POLICIES = {
+    "/repos": CachePolicy(),
+    "/repos/batch": CachePolicy(),
+    "/repos/by-name": CachePolicy(),
+    "/repos/{repo_id}": CachePolicy(),
+    "/repos/{repo_id}/similar": CachePolicy(),
+    "/repos/{owner}/{name}/similar": CachePolicy(),
+    "/boards": CachePolicy(),
+    "/boards/{board_id}": CachePolicy(),
+    "/search": CachePolicy(),
+    "/search/semantic": CachePolicy(max_age=60, etag=False),
+    "/stats": CachePolicy(),
+}
+
+# Outermost last: CORS, then compression, then ETag/Cache-Control
+app.add_middleware(HTTPCacheMiddleware, router=app.router, policies=HTTP_CACHE_POLICIES, cache=response_cache)
+app.add_middleware(CompressionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -37,8 +92,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware, router=app.router)
+
+
+# Sort keys for /repos; each pairs with Repo.id as the tie-breaker and has a (key, id) index
+REPO_SORTS = {
+    "stars": Repo.stars,
+    "velocity": Repo.star_velocity,
+    "created": Repo.created_at,
+    "score": CurationScore.total_score,
+}
+
+
+def paginate_or_400(query, column, id_column, sort: str, limit: int, cursor: Optional[str], skip: int) -> Page:
+    """Run paginate(), reporting a bad cursor as a client error."""
+    try:
+        return paginate(query, column, id_column, sort, limit, cursor=cursor, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def get_projection(
+    view: str = Query("card", pattern="^(card|full)$",
+                      description="card (default) for slim repo cards; full for every field, including README and file tree"),
+    fields: Optional[str] = Query(None, description="Comma-separated repo fields, plus 'summary'"),
+) -> Optional[Projection]:
+    """
+    Dependency resolving view/fields into a Projection (None for the full response).
+    List endpoints default to cards; view=full returns complete repos.
+    """
+    try:
+        return parse_projection(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def projected_response(items: list, next_cursor: Optional[str] = None) -> JSONResponse:
+    """Return projected dicts as-is, so unrequested fields are absent rather than null."""
+    response = JSONResponse(content=jsonable_encoder(items))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+_semantic_search = None
+
+
+def get_semantic_search():
+    """Dependency for the (embedder, vector DB) pair, created on first use."""
+    global _semantic_search
+    if _semantic_search is None:
+        try:
+            from embedding_service.embedder import EmbeddingService
+            from embedding_service.vector_db import QdrantClient
+            _semantic_search = (EmbeddingService(), QdrantClient())
+        except (ImportError, ValueError) as e:
+            raise HTTPException(status_code=503, detail=f"Semantic search unavailable: {e}")
+    return _semantic_search
+
 
 def get_db():
     """Dependency for database session."""
@@ -49,15 +164,26 @@ def get_db():
         db.close()
 
 
+def full_repo_options() -> list:
+    """Loader options undeferring the columns the full view decodes (README, file tree)."""
+    return [undefer(Repo.readme_compressed), undefer(Repo.file_tree_compact)]
+
+
 def repo_to_dict(repo: Repo) -> dict:
-    """Convert SQLAlchemy Repo to dict for Pydantic."""
+    """
+    Convert SQLAlchemy Repo to dict for Pydantic.
+    Decodes the full README and file tree, so queries feeding the full view
+    should load them with full_repo_options() rather than once per row.
+    """
     return {
+        "id": repo.id,
         "url": repo.url,
         "full_name": repo.full_name,
         "name": repo.name,
         "owner": repo.owner,
         "description": repo.description,
         "readme": repo.readme,
+        "readme_preview": repo.readme_preview,
         "languages": repo.languages or {},
         "stars": repo.stars,
         "forks": repo.forks,
@@ -70,7 +196,8 @@ def repo_to_dict(repo: Repo) -> dict:
         "topics": repo.topics or [],
         "license": repo.license,
         "archived": repo.archived,
-        "file_tree": repo.file_tree,
+        "file_tree": file_tree_to_nested(repo.file_tree_compact),
+        "file_tree_features": repo.file_tree_features,
         "commit_count": repo.commit_count,
         "contributor_count": repo.contributor_count,
         "star_velocity": repo.star_velocity,
@@ -98,21 +225,58 @@ async def root():
     return {"message": "RepoBoard API", "version": "1.0.0"}
 
 
-@app.get("/repos", response_model=List[RepoWithSummary])
-async def list_repos(
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics. Async and DB-free, so it still answers when the
+    threadpool or connection pool is exhausted.
+    """
+    return Response(content=METRICS_REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/repos", response_model=Union[List[RepoWithSummary], List[RepoCardWithSummary]])
+def list_repos(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: str = Query("stars", pattern="^(stars|velocity|created|score)$"),
     category: Optional[str] = None,
     language: Optional[str] = None,
     min_stars: Optional[int] = Query(None, ge=0),
     skill_level: Optional[str] = None,
+    projection: Optional[Projection] = Depends(get_projection),
     db: Session = Depends(get_db)
 ):
-    """List repositories with optional filters."""
+    """
+    List repositories with optional filters.
+    Pass the X-Next-Cursor response header back as cursor for the next page;
+    skip still works but gets slower the deeper it goes. Repos are cards
+    unless view=full; fields= loads and returns only the listed columns.
+    """
     query = db.query(Repo).filter(Repo.archived == False)
+    if sort == "score":
+        query = query.join(CurationScore, CurationScore.repo_id == Repo.id)
+    if projection:
+        query = query.options(load_only(*projection.repo_columns()))
+    else:
+        query = query.options(*full_repo_options())
     
-    if category:
-        query = query.join(RepoSummary).filter(RepoSummary.category == category)
+    if category or skill_level:
+        # Summaries are already joined for filtering, so load them from the same rows
+        query = query.join(RepoSummary)
+        if category:
+            query = query.filter(RepoSummary.category == category)
+        if skill_level:
+            query = query.filter(RepoSummary.skill_level == skill_level)
+        if not projection:
+            query = query.options(contains_eager(Repo.summary))
+        elif projection.include_summary:
+            query = query.options(contains_eager(Repo.summary).load_only(*projection.summary_columns()))
+    elif not projection:
+        query = query.options(selectinload(Repo.summary))
+    elif projection.include_summary:
+        query = query.options(selectinload(Repo.summary).load_only(*projection.summary_columns()))
     
     if language:
         # Filter by language in languages JSON field
@@ -121,13 +285,15 @@ async def list_repos(
     if min_stars:
         query = query.filter(Repo.stars >= min_stars)
     
-    if skill_level:
-        query = query.join(RepoSummary).filter(RepoSummary.skill_level == skill_level)
-    
-    repos = query.offset(skip).limit(limit).all()
+    id_column = CurationScore.repo_id if sort == "score" else Repo.id
+    page = paginate_or_400(query, REPO_SORTS[sort], id_column, sort, limit, cursor, skip)
+    if projection:
+        return projected_response([projection.project(repo) for repo in page.items], page.next_cursor)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
     
     result = []
-    for repo in repos:
+    for repo in page.items:
         summary = repo.summary
         result.append(RepoWithSummary(
             repo=RepoMetadata(**repo_to_dict(repo)),
@@ -137,10 +303,71 @@ async def list_repos(
     return result
 
 
+def parse_batch_keys(value: str, cast=str) -> list:
+    """Split a comma-separated key list, dropping duplicates but keeping order."""
+    try:
+        keys = list(dict.fromkeys(cast(key.strip()) for key in value.split(",") if key.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid key list: {value}")
+    if not keys:
+        raise HTTPException(status_code=400, detail="No keys given")
+    if len(keys) > settings.api_batch_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.api_batch_max_items} items per request")
+    return keys
+
+
+def batch_repos(db: Session, column, keys: list, projection: Optional[Projection] = None):
+    """
+    Load the repos whose column is in keys, with their summaries, in one
+    query and return them in request order. Unknown keys are skipped.
+    """
+    query = db.query(Repo).filter(column.in_(keys))
+    if projection:
+        query = query.options(load_only(*projection.repo_columns(), column))
+        if projection.include_summary:
+            query = query.options(joinedload(Repo.summary).load_only(*projection.summary_columns()))
+    else:
+        query = query.options(joinedload(Repo.summary), *full_repo_options())
+    by_key = {getattr(repo, column.key): repo for repo in query}
+    repos = [by_key[key] for key in keys if key in by_key]
+    
+    if projection:
+        return projected_response([projection.project(repo) for repo in repos])
+    return [
+        RepoWithSummary(
+            repo=RepoMetadata(**repo_to_dict(repo)),
+            summary=RepoSummarySchema(**summary_to_dict(repo.summary)) if repo.summary else None
+        )
+        for repo in repos
+    ]
+
+
+@app.get("/repos/batch", response_model=Union[List[RepoWithSummary], List[RepoCardWithSummary]])
+def get_repos_batch(
+    ids: str = Query(..., description="Comma-separated repo IDs"),
+    projection: Optional[Projection] = Depends(get_projection),
+    db: Session = Depends(get_db)
+):
+    """Get many repositories by ID in one request, in the order given."""
+    return batch_repos(db, Repo.id, parse_batch_keys(ids, int), projection)
+
+
+@app.get("/repos/by-name", response_model=Union[List[RepoWithSummary], List[RepoCardWithSummary]])
+def get_repos_by_name(
+    full_names: str = Query(..., description="Comma-separated owner/name pairs"),
+    projection: Optional[Projection] = Depends(get_projection),
+    db: Session = Depends(get_db)
+):
+    """Get many repositories by GitHub full name in one request, in the order given."""
+    return batch_repos(db, Repo.full_name, parse_batch_keys(full_names), projection)
+
+
 @app.get("/repos/{repo_id}", response_model=RepoWithSummary)
-async def get_repo(repo_id: int, db: Session = Depends(get_db)):
+def get_repo(repo_id: int, db: Session = Depends(get_db)):
     """Get a single repository by ID."""
-    repo = db.query(Repo).filter(Repo.id == repo_id).first()
+    repo = db.query(Repo).options(
+        joinedload(Repo.summary), *full_repo_options()
+    ).filter(Repo.id == repo_id).first()
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
     
@@ -151,57 +378,137 @@ async def get_repo(repo_id: int, db: Session = Depends(get_db)):
     )
 
 
+def similar_repos(query, limit: int, projection: Optional[Projection] = None):
+    """Load precomputed neighbors with their repos and summaries in one query."""
+    if projection:
+        neighbor = contains_eager(RepoNeighbor.neighbor).load_only(*projection.repo_columns())
+        options = [neighbor.joinedload(Repo.summary).load_only(*projection.summary_columns())] if projection.include_summary else [neighbor]
+    else:
+        options = [contains_eager(RepoNeighbor.neighbor).options(joinedload(Repo.summary), *full_repo_options())]
+    neighbors = query.join(RepoNeighbor.neighbor).options(*options).filter(
+        Repo.archived == False
+    ).order_by(RepoNeighbor.rank).limit(limit).all()
+    if projection:
+        return projected_response([
+            {**projection.project(neighbor.neighbor), "score": neighbor.score}
+            for neighbor in neighbors
+        ])
+    return [
+        SimilarRepo(
+            repo=RepoMetadata(**repo_to_dict(neighbor.neighbor)),
+            summary=RepoSummarySchema(**summary_to_dict(neighbor.neighbor.summary)) if neighbor.neighbor.summary else None,
+            score=neighbor.score,
+        )
+        for neighbor in neighbors
+    ]
+
+
+@app.get("/repos/{repo_id}/similar", response_model=List[SimilarRepo])
+def get_similar_repos(
+    repo_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    projection: Optional[Projection] = Depends(get_projection),
+    db: Session = Depends(get_db)
+):
+    """Most similar repositories by embedding, from the precomputed neighbor lists."""
+    return similar_repos(db.query(RepoNeighbor).filter(RepoNeighbor.repo_id == repo_id), limit, projection)
+
+
+@app.get("/repos/{owner}/{name}/similar", response_model=List[SimilarRepo])
+def get_similar_repos_by_name(
+    owner: str,
+    name: str,
+    limit: int = Query(10, ge=1, le=50),
+    projection: Optional[Projection] = Depends(get_projection),
+    db: Session = Depends(get_db)
+):
+    """Same as /repos/{repo_id}/similar, addressed by GitHub full name."""
+    source = aliased(Repo)
+    query = db.query(RepoNeighbor).join(source, source.id == RepoNeighbor.repo_id).filter(
+        source.full_name == f"{owner}/{name}"
+    )
+    return similar_repos(query, limit, projection)
+
+
 @app.get("/boards", response_model=List[BoardSchema])
-async def list_boards(
+def list_boards(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List all boards."""
-    query = db.query(Board)
-    
-    if category:
-        query = query.filter(Board.category == category)
+    """
+    List all boards, newest first (cursor pagination as in /repos).
+    Ids grow with creation time, so pages are keyed on the id alone: SQLite
+    stores server-side created_at without microseconds, which never compares
+    equal to a decoded cursor timestamp.
+    """
+    def build():
+        query = db.query(Board)
+        
+        if category:
+            query = query.filter(Board.category == category)
+        
+        page = paginate_or_400(query, Board.id, Board.id, "newest", limit, cursor, skip)
+        return Page([
+            BoardSchema(
+                id=board.id,
+                name=board.name,
+                description=board.description,
+                category=board.category,
+                repo_count=board.repo_count,
+                created_at=board.created_at,
+                updated_at=board.updated_at,
+            )
+            for board in page.items
+        ], page.next_cursor)
     
-    boards = query.order_by(Board.created_at.desc()).offset(skip).limit(limit).all()
-    return [
-        BoardSchema(
-            id=board.id,
-            name=board.name,
-            description=board.description,
-            category=board.category,
-            repo_count=board.repo_count,
-            created_at=board.created_at,
-            updated_at=board.updated_at,
-        )
-        for board in boards
-    ]
+    return response_cache.get_or_build(f"boards:{skip}:{cursor or ''}:{limit}:{category or ''}", build)
+
+
+@app.get("/boards/{board_id}", response_model=Union[BoardWithRepos, BoardWithRepoCards])
+def get_board(
+    board_id: int,
+    projection: Optional[Projection] = Depends(get_projection),
+    db: Session = Depends(get_db)
+):
+    """Get a board with its repositories as cards (view=full for complete repos)."""
+    key = f"board:{board_id}:{projection.key if projection else 'full'}"
+    return response_cache.get_or_build(key, lambda: _build_board(board_id, db, projection))
 
 
-@app.get("/boards/{board_id}", response_model=BoardWithRepos)
-async def get_board(board_id: int, db: Session = Depends(get_db)):
-    """Get a board with its repositories."""
+def _build_board(board_id: int, db: Session, projection: Optional[Projection] = None):
     board = db.query(Board).filter(Board.id == board_id).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     
-    # Get board items ordered by rank
-    items = db.query(BoardItem).filter(
+    # Get board items ordered by rank, with their repos and summaries in the same query
+    if projection:
+        repo_option = joinedload(BoardItem.repo).load_only(*projection.repo_columns())
+        if projection.include_summary:
+            repo_option = repo_option.joinedload(Repo.summary).load_only(*projection.summary_columns())
+    else:
+        repo_option = joinedload(BoardItem.repo).options(joinedload(Repo.summary), *full_repo_options())
+    items = db.query(BoardItem).options(repo_option).filter(
         BoardItem.board_id == board_id
     ).order_by(BoardItem.rank_position).all()
     
     repos = []
     for item in items:
-        repo = db.query(Repo).filter(Repo.id == item.repo_id).first()
-        if repo:
+        repo = item.repo
+        if not repo:
+            continue
+        if projection:
+            repos.append(projection.project(repo))
+        else:
             summary = repo.summary
             repos.append(RepoWithSummary(
                 repo=RepoMetadata(**repo_to_dict(repo)),
                 summary=RepoSummarySchema(**summary_to_dict(summary)) if summary else None
             ))
     
-    return BoardWithRepos(
+    return dict(
         board=BoardSchema(
             id=board.id,
             name=board.name,
@@ -211,28 +518,51 @@ async def get_board(board_id: int, db: Session = Depends(get_db)):
             created_at=board.created_at,
             updated_at=board.updated_at,
         ),
-        repos=repos
+        repos=repos,
     )
 
 
-@app.get("/search")
-async def search_repos(
+@app.get("/search", response_model=Union[List[RepoWithSummary], List[RepoCardWithSummary]])
+def search_repos(
+    response: Response,
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    projection: Optional[Projection] = Depends(get_projection),
     db: Session = Depends(get_db)
 ):
-    """Search repositories by name, description, or tags."""
-    query = db.query(Repo).join(RepoSummary).filter(Repo.archived == False)
+    """
+    Full-text search over names, descriptions, topics, summaries and tags,
+    ranked by relevance. PostgreSQL uses the GIN-indexed search_vector; other
+    databases use an in-process inverted index rebuilt per data generation.
+    """
+    query = db.query(Repo).outerjoin(RepoSummary).filter(Repo.archived == False)
+    if not projection:
+        query = query.options(contains_eager(Repo.summary), *full_repo_options())
+    else:
+        query = query.options(load_only(*projection.repo_columns()))
+        if projection.include_summary:
+            query = query.options(contains_eager(Repo.summary).load_only(*projection.summary_columns()))
     
-    # Simple text search (in production, use full-text search)
-    search_term = f"%{q}%"
-    query = query.filter(
-        (Repo.name.ilike(search_term)) |
-        (Repo.description.ilike(search_term)) |
-        (RepoSummary.summary.ilike(search_term))
-    )
+    if uses_tsvector(db):
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(Repo.search_vector, ts_query, type_=Float)
+        query = query.filter(Repo.search_vector.op("@@")(ts_query))
+        page = paginate_or_400(query, rank, Repo.id, "relevance", limit, cursor, 0)
+        repos = page.items
+    else:
+        index = fallback_search_index.get(db, response_cache.generation())
+        try:
+            page = paginate_ranked(index.search(q), "relevance", limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        by_id = {repo.id: repo for repo in query.filter(Repo.id.in_(page.items))} if page.items else {}
+        repos = [by_id[repo_id] for repo_id in page.items if repo_id in by_id]
     
-    repos = query.limit(limit).all()
+    if projection:
+        return projected_response([projection.project(repo) for repo in repos], page.next_cursor)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
     
     result = []
     for repo in repos:
@@ -245,18 +575,54 @@ async def search_repos(
     return result
 
 
-@app.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
-    """Get overall statistics."""
-    total_repos = db.query(Repo).filter(Repo.archived == False).count()
-    total_boards = db.query(Board).count()
-    total_categories = db.query(RepoSummary.category).distinct().count()
+@app.get("/search/semantic", response_model=List[SemanticSearchResult])
+def semantic_search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    semantic=Depends(get_semantic_search),
+):
+    """Search repositories by embedding similarity to the query."""
+    embedder, vector_db = semantic
+    query_vector = embedder.embed_query(q)
+    # Archived repos are only filtered out here, so over-fetch vector hits and
+    # widen the search until `limit` survive or the collection runs out
+    candidates = min(limit * settings.semantic_search_overfetch, settings.semantic_search_max_candidates)
+    while True:
+        hits = embedder.search_similar(query_vector, vector_db, limit=candidates)
+        scores = {int(hit["id"]): hit["score"] for hit in hits}
+        if not scores:
+            return []
+        
+        # Hydrate every hit in one query, then restore similarity order
+        repos = db.query(Repo).outerjoin(RepoSummary).options(
+            contains_eager(Repo.summary), *full_repo_options()
+        ).filter(Repo.id.in_(scores), Repo.archived == False).all()
+        if len(repos) >= limit or len(hits) < candidates or candidates >= settings.semantic_search_max_candidates:
+            break
+        candidates = min(candidates * 2, settings.semantic_search_max_candidates)
+    repos.sort(key=lambda repo: scores[repo.id], reverse=True)
+    repos = repos[:limit]
     
-    return {
-        "total_repos": total_repos,
-        "total_boards": total_boards,
-        "total_categories": total_categories,
-    }
+    return [
+        SemanticSearchResult(
+            repo=RepoMetadata(**repo_to_dict(repo)),
+            summary=RepoSummarySchema(**summary_to_dict(repo.summary)) if repo.summary else None,
+            score=scores[repo.id],
+        )
+        for repo in repos
+    ]
+
+
+@app.get("/stats")
+def get_stats(db: Session = Depends(get_db)):
+    """Get overall statistics, with per-category and per-language repo counts."""
+    return response_cache.get_or_build("stats", lambda: _build_stats(db))
+
+
+def _build_stats(db: Session) -> dict:
+    # Materialized counters (db.stats): one primary-key read, breakdowns included
+    return read_stats(db)
 
 
 if __name__ == "__main__":
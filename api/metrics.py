@@ -0,0 +1,77 @@
+"""Per-route request metrics for the API, exposed at /metrics."""
+
+import time
+from typing import Optional
+
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db.metrics import track_queries
+from shared.metrics import Counter, Gauge, Histogram
+
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter("repoboard_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+REQUEST_SECONDS = Histogram("repoboard_http_request_duration_seconds", "HTTP request latency", ("route", "method"))
+REQUESTS_IN_FLIGHT = Gauge("repoboard_http_requests_in_flight", "HTTP requests being served", ("route",))
+REQUEST_DB_QUERIES = Histogram(
+    "repoboard_http_request_db_queries",
+    "SQL statements per HTTP request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_ROWS = Histogram(
+    "repoboard_http_request_db_rows",
+    "Rows returned or affected per HTTP request, where the driver reports them",
+    ("route",),
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+
+
+def route_path(router: Router, scope: Scope) -> Optional[str]:
+    """Path template of the route the request resolves to (e.g. /boards/{board_id})."""
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, in-flight requests and the SQL statements and
+    rows each request ran, labelled by route template so label values stay
+    bounded.
+    """
+    
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.router = router
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        route = route_path(self.router, scope) or UNMATCHED_ROUTE
+        method = scope["method"]
+        status = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        REQUESTS_IN_FLIGHT.inc(route=route)
+        start = time.perf_counter()
+        try:
+            with track_queries() as stats:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=method)
+            REQUESTS.inc(route=route, method=method, status=status)
+            REQUEST_DB_QUERIES.observe(stats.queries, route=route)
+            REQUEST_DB_ROWS.observe(stats.rows, route=route)
+            REQUESTS_IN_FLIGHT.dec(route=route)
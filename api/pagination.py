@@ -0,0 +1,94 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, DateTime
+from sqlalchemy.orm import Query
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    """One page of results plus the opaque cursor for the next page (None on the last page)."""
+    items: Any
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Encode the sort key and id of the last row into an opaque cursor."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, last_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, column=None) -> Tuple[Any, int]:
+    """Decode a cursor for the given sort, raising ValueError if it is malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(last_id, int):
+        raise ValueError(f"Cursor does not belong to sort '{sort}'")
+    if value is not None and column is not None and isinstance(column.type, DateTime):
+        value = datetime.fromisoformat(value)
+    return value, last_id
+
+
+def paginate(
+    query: Query,
+    column,
+    id_column,
+    sort: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Page:
+    """
+    Order query by (column DESC NULLS FIRST, id DESC) and return one page.
+
+    With a cursor, rows are selected by ``column <= value AND (column < value
+    OR id < last_id)``: the leading range condition lets the database walk an
+    index on (column, id) backwards from the cursor, so every page costs the
+    same. Without one, the legacy skip offset is applied. One extra row is
+    fetched to tell whether a next page exists.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, column)
+        if value is None:
+            query = query.filter(or_(column.isnot(None), and_(column.is_(None), id_column < last_id)))
+        else:
+            query = query.filter(column <= value, or_(column < value, id_column < last_id))
+    
+    query = query.add_columns(column, id_column).order_by(column.desc().nullsfirst(), id_column.desc())
+    if not cursor and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    
+    items: List[Any] = [row[0] for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        _, value, last_id = rows[limit - 1]
+        next_cursor = encode_cursor(sort, value, last_id)
+    return Page(items, next_cursor)
+
+
+def paginate_ranked(ranked: Sequence[Tuple[float, int]], sort: str, limit: int, cursor: Optional[str] = None) -> Page:
+    """Page through an in-memory (score, id) list already sorted best first; items are ids."""
+    start = 0
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        while start < len(ranked) and ranked[start] >= (value, last_id):
+            start += 1
+    window = ranked[start:start + limit + 1]
+    next_cursor = None
+    if len(window) > limit:
+        score, last_id = window[limit - 1]
+        next_cursor = encode_cursor(sort, score, last_id)
+    return Page([repo_id for _, repo_id in window[:limit]], next_cursor)
+
@@ -0,0 +1,98 @@
+"""Field projection for repo list endpoints (view=card|full, fields=...)."""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from db.models import Repo, RepoSummary
+
+
+# Response field -> mapped column. The full README and file_tree are only in view=full.
+REPO_FIELD_COLUMNS = {
+    "id": Repo.id,
+    "url": Repo.url,
+    "full_name": Repo.full_name,
+    "name": Repo.name,
+    "owner": Repo.owner,
+    "description": Repo.description,
+    "readme_preview": Repo.readme_preview,
+    "languages": Repo.languages,
+    "stars": Repo.stars,
+    "forks": Repo.forks,
+    "watchers": Repo.watchers,
+    "open_issues": Repo.open_issues,
+    "created_at": Repo.created_at,
+    "updated_at": Repo.updated_at,
+    "pushed_at": Repo.pushed_at,
+    "default_branch": Repo.default_branch,
+    "topics": Repo.topics,
+    "license": Repo.license,
+    "archived": Repo.archived,
+    "file_tree_features": Repo.file_tree_features,
+    "commit_count": Repo.commit_count,
+    "contributor_count": Repo.contributor_count,
+    "star_velocity": Repo.star_velocity,
+}
+
+# Pseudo-field selecting the card summary below
+SUMMARY_FIELD = "summary"
+
+CARD_FIELDS = ("id", "url", "full_name", "name", "owner", "description", "stars", "star_velocity", "topics", SUMMARY_FIELD)
+
+SUMMARY_CARD_COLUMNS = (
+    RepoSummary.repo_id, RepoSummary.summary, RepoSummary.tags, RepoSummary.category, RepoSummary.skill_level,
+)
+
+
+class Projection(NamedTuple):
+    """Repo fields to load and return, and whether to include the card summary."""
+    repo_fields: Tuple[str, ...]
+    include_summary: bool
+    
+    @property
+    def key(self) -> str:
+        """Stable form for cache keys."""
+        return ",".join(self.repo_fields) + (f",{SUMMARY_FIELD}" if self.include_summary else "")
+    
+    def repo_columns(self) -> List[Any]:
+        """Columns for load_only(); the primary key is always loaded."""
+        return [Repo.id] + [REPO_FIELD_COLUMNS[field] for field in self.repo_fields if field != "id"]
+    
+    def summary_columns(self) -> List[Any]:
+        return [RepoSummary.id, *SUMMARY_CARD_COLUMNS]
+    
+    def project(self, repo: Repo) -> Dict[str, Any]:
+        """Serialize only the projected fields, without touching unloaded columns."""
+        item = {
+            "repo": {
+                field: getattr(repo, REPO_FIELD_COLUMNS[field].key)
+                for field in self.repo_fields
+            }
+        }
+        if self.include_summary:
+            summary = repo.summary
+            item["summary"] = {
+                "summary": summary.summary,
+                "tags": summary.tags or [],
+                "category": summary.category,
+                "skill_level": summary.skill_level,
+            } if summary else None
+        return item
+
+
+def parse_projection(view: str = "card", fields: Optional[str] = None) -> Optional[Projection]:
+    """
+    Resolve view/fields into a Projection, or None for the full response.
+    Raises ValueError for unknown fields.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+    elif view == "card":
+        requested = list(CARD_FIELDS)
+    else:
+        return None
+    
+    unknown = [field for field in requested if field != SUMMARY_FIELD and field not in REPO_FIELD_COLUMNS]
+    if unknown:
+        allowed = ", ".join(sorted(REPO_FIELD_COLUMNS) + [SUMMARY_FIELD])
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {allowed}")
+    repo_fields = tuple(dict.fromkeys(field for field in requested if field != SUMMARY_FIELD))
+    return Projection(repo_fields, SUMMARY_FIELD in requested)
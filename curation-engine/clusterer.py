@@ -9,6 +9,8 @@ import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.connection import get_db
+from db.generation import bump_generation
+from db.stats import apply_stat_deltas
 from db.models import Repo, Board, BoardItem
 from embedding_service.vector_db import QdrantClient
 from llm_service.llm_client import LLMClient
@@ -86,8 +88,8 @@ class RepoClusterer:
                 # Project health
                 features.append(summary.project_health_score)
                 
-                # Star velocity (normalized)
-                features.append(min(repo.star_velocity / 100.0, 1.0))
+                # Star velocity (normalized), recent window when history exists
+                features.append(min(self.ranker.trending_velocity(repo) / 100.0, 1.0))
                 
                 # Languages (top 5)
                 top_langs = sorted(repo.languages.items(), key=lambda x: x[1], reverse=True)[:5] if repo.languages else []
@@ -172,6 +174,7 @@ class RepoClusterer:
                     repo_count=len(repo_ids)
                 )
                 db.add(board)
+                apply_stat_deltas(db, boards=1)
                 db.commit()
                 db.refresh(board)
             
@@ -192,6 +195,7 @@ class RepoClusterer:
                 db.add(board_item)
             
             board.repo_count = len(scores)
+            bump_generation(db)
             db.commit()
             db.refresh(board)
             
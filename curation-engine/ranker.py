@@ -8,7 +8,10 @@ import math
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy.orm import undefer
+
 from db.connection import get_db
+from db.generation import bump_generation
 from db.models import Repo, RepoSummary, CurationScore
 from shared.schemas import CurationScore as CurationScoreSchema
 
@@ -99,9 +102,15 @@ class RepoRanker:
         # Normalize 1-10 to 0-1, but invert so higher skill = higher weight
         return skill_numeric / 10.0
     
+    def trending_velocity(self, repo: Repo) -> float:
+        """Recent (7-day) star velocity, falling back to lifetime velocity without history."""
+        if repo.star_velocity_7d is not None:
+            return max(repo.star_velocity_7d, 0.0)
+        return repo.star_velocity or 0.0
+    
     def calculate_total_score(self, repo: Repo, summary: Optional[RepoSummary], all_repos: List[Repo], max_velocity: float) -> CurationScoreSchema:
         """Calculate total curation score for a repository."""
-        star_velocity_score = self.calculate_star_velocity_score(repo.star_velocity, max_velocity)
+        star_velocity_score = self.calculate_star_velocity_score(self.trending_velocity(repo), max_velocity)
         project_health_score = self.calculate_project_health_score(summary)
         uniqueness_score = self.calculate_uniqueness_score(repo, all_repos)
         readme_quality_score = self.calculate_readme_quality_score(repo.readme)
@@ -130,16 +139,18 @@ class RepoRanker:
     def rank_repos(self, repo_ids: Optional[List[int]] = None) -> List[CurationScore]:
         """Rank all repositories and store scores."""
         with get_db() as db:
+            # README quality needs the full text, so load it with the rows
+            query = db.query(Repo).options(undefer(Repo.readme_compressed))
             if repo_ids:
-                repos = db.query(Repo).filter(Repo.id.in_(repo_ids)).all()
+                repos = query.filter(Repo.id.in_(repo_ids)).all()
             else:
-                repos = db.query(Repo).filter(Repo.archived == False).all()
+                repos = query.filter(Repo.archived == False).all()
             
             # Get all summaries
             summaries = {s.repo_id: s for s in db.query(RepoSummary).all()}
             
             # Find max velocity for normalization
-            max_velocity = max([r.star_velocity for r in repos], default=1.0)
+            max_velocity = max([self.trending_velocity(r) for r in repos], default=1.0)
             
             # Calculate scores
             scores = []
@@ -163,6 +174,7 @@ class RepoRanker:
                     db.add(score)
                     scores.append(score)
             
+            bump_generation(db)
             db.commit()
             
             # Sort by total score
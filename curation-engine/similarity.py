@@ -0,0 +1,140 @@
+"""Precomputed nearest-neighbor lists for "similar repositories"."""
+
+import sys
+import os
+from typing import List, Dict, Tuple, Iterable
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import or_
+
+from db.connection import get_db
+from db.generation import bump_generation
+from db.models import Repo, RepoNeighbor
+from embedding_service.vector_db import QdrantClient
+from shared.config import settings
+
+
+COLLECTION_NAME = "repo_embeddings"
+
+
+class SimilarRepoBuilder:
+    """
+    Computes the top-N most similar repos per repo from the stored embeddings
+    and persists them in repo_neighbors, so serving them is one indexed lookup.
+    """
+    
+    def __init__(self, vector_db_client: QdrantClient, count: int = None, candidates: int = None, chunk_size: int = 100):
+        self.vector_db = vector_db_client
+        self.count = count or settings.similar_repos_count
+        self.candidates = max(candidates or settings.similar_repos_candidates, self.count)
+        self.chunk_size = chunk_size
+    
+    def rebuild_all(self) -> int:
+        """Recompute neighbors for every non-archived repo."""
+        with get_db() as db:
+            repo_ids = [repo_id for repo_id, in db.query(Repo.id).filter(Repo.archived == False)]
+        return self._refresh_chunks(repo_ids)
+    
+    def refresh_stale(self) -> int:
+        """Recompute neighbors for repos whose embedding changed since their last computation."""
+        with get_db() as db:
+            repo_ids = [
+                repo_id for repo_id, in db.query(Repo.id).filter(
+                    Repo.archived == False,
+                    Repo.embedding_updated_at != None,
+                    or_(Repo.neighbors_updated_at == None, Repo.neighbors_updated_at < Repo.embedding_updated_at),
+                )
+            ]
+        return self._refresh_chunks(repo_ids)
+    
+    def refresh(self, repo_ids: Iterable[int]) -> int:
+        """Recompute neighbors for repos whose embeddings changed (see _refresh_chunk)."""
+        return self._refresh_chunks(list(repo_ids))
+    
+    def _refresh_chunks(self, repo_ids: List[int]) -> int:
+        refreshed = 0
+        for start in range(0, len(repo_ids), self.chunk_size):
+            refreshed += self._refresh_chunk(repo_ids[start:start + self.chunk_size])
+        print(f"Refreshed similar repos for {refreshed} repositories")
+        return refreshed
+    
+    def _search(self, vector: List[float], repo_id: int, limit: int) -> List[Tuple[int, float]]:
+        """Nearest stored vectors to vector, excluding repo_id itself."""
+        hits = self.vector_db.search(collection_name=COLLECTION_NAME, query_vector=vector, limit=limit + 1)
+        return [(int(hit["id"]), hit["score"]) for hit in hits if int(hit["id"]) != repo_id][:limit]
+    
+    def _refresh_chunk(self, changed_ids: List[int]) -> int:
+        """
+        Recompute lists for the changed repos and for repos that listed them
+        (their scores moved), then insert each changed repo into the lists of
+        its nearest candidates where it now beats their weakest neighbor.
+        """
+        changed = set(changed_ids)
+        with get_db() as db:
+            dependent_ids = {
+                repo_id for repo_id, in db.query(RepoNeighbor.repo_id).filter(RepoNeighbor.neighbor_id.in_(changed_ids))
+            } - changed
+            recompute_ids = list(changed_ids) + sorted(dependent_ids)
+            vectors = self.vector_db.get_vectors(COLLECTION_NAME, recompute_ids)
+            
+            lists: Dict[int, List[Tuple[int, float]]] = {}
+            reverse_candidates: Dict[int, List[Tuple[int, float]]] = {}
+            for repo_id in recompute_ids:
+                if repo_id not in vectors:
+                    continue
+                hits = self._search(vectors[repo_id], repo_id, self.candidates if repo_id in changed else self.count)
+                lists[repo_id] = hits[:self.count]
+                if repo_id in changed:
+                    reverse_candidates[repo_id] = hits
+            
+            # Only keep neighbors that still exist in the database
+            hit_ids = {neighbor_id for hits in reverse_candidates.values() for neighbor_id, _ in hits}
+            hit_ids |= {neighbor_id for hits in lists.values() for neighbor_id, _ in hits}
+            known_ids = {repo_id for repo_id, in db.query(Repo.id).filter(Repo.id.in_(hit_ids))} if hit_ids else set()
+            
+            # Patch the lists of untouched repos that the changed repos now belong in
+            current_lists: Dict[int, List[Tuple[int, float]]] = {}
+            patched: Dict[int, List[Tuple[int, float]]] = {}
+            targets = {
+                neighbor_id for hits in reverse_candidates.values() for neighbor_id, _ in hits
+                if neighbor_id in known_ids and neighbor_id not in lists
+            }
+            if targets:
+                for row in db.query(RepoNeighbor).filter(RepoNeighbor.repo_id.in_(targets)).order_by(RepoNeighbor.rank):
+                    current_lists.setdefault(row.repo_id, []).append((row.neighbor_id, row.score))
+                for repo_id, hits in reverse_candidates.items():
+                    for neighbor_id, score in hits:
+                        if neighbor_id not in targets:
+                            continue
+                        current = current_lists.setdefault(neighbor_id, [])
+                        if len(current) < self.count or score > current[-1][1]:
+                            current.append((repo_id, score))
+                            current.sort(key=lambda item: item[1], reverse=True)
+                            del current[self.count:]
+                            patched[neighbor_id] = current
+            
+            self._write(db, {
+                **patched,
+                **{
+                    repo_id: [(neighbor_id, score) for neighbor_id, score in hits if neighbor_id in known_ids]
+                    for repo_id, hits in lists.items()
+                },
+            })
+            db.query(Repo).filter(Repo.id.in_(list(lists))).update(
+                {Repo.neighbors_updated_at: datetime.utcnow()}, synchronize_session=False
+            )
+            return len(lists)
+    
+    def _write(self, db, lists: Dict[int, List[Tuple[int, float]]]):
+        """Replace the stored neighbor lists for the given repos."""
+        if not lists:
+            return
+        bump_generation(db)
+        db.query(RepoNeighbor).filter(RepoNeighbor.repo_id.in_(list(lists))).delete(synchronize_session=False)
+        db.bulk_insert_mappings(RepoNeighbor, [
+            {"repo_id": repo_id, "neighbor_id": neighbor_id, "rank": rank, "score": score}
+            for repo_id, hits in lists.items()
+            for rank, (neighbor_id, score) in enumerate(hits)
+        ])
@@ -6,15 +6,18 @@ from contextlib import contextmanager
 from typing import Generator
 
 from shared.config import settings
+from db.metrics import TimedQueuePool, instrument_engine
 from db.models import Base
 
 
 engine = create_engine(
     settings.database_url,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
 )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,28 @@
+"""Data-generation counter used to invalidate API response caches."""
+
+from sqlalchemy.orm import Session
+
+from db.models import DataGeneration
+
+
+DEFAULT_GENERATION = "default"
+
+
+def bump_generation(db: Session, name: str = DEFAULT_GENERATION) -> None:
+    """
+    Increment the generation inside the caller's transaction. The row is
+    locked until commit, so bulk writers bump once per batch, after their
+    data commits (see RepoWriter.write), rather than once per chunk.
+    """
+    updated = db.query(DataGeneration).filter(DataGeneration.name == name).update(
+        {DataGeneration.value: DataGeneration.value + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(DataGeneration(name=name, value=1))
+        db.flush()
+
+
+def get_generation(db: Session, name: str = DEFAULT_GENERATION) -> int:
+    """Read the current generation (a primary-key lookup)."""
+    value = db.query(DataGeneration.value).filter(DataGeneration.name == name).scalar()
+    return value or 0
@@ -0,0 +1,94 @@
+"""Database metrics collected from SQLAlchemy engine and pool events."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from shared.metrics import Counter, Gauge, Histogram
+
+
+DB_QUERIES = Counter("repoboard_db_queries_total", "SQL statements executed")
+DB_ROWS = Counter(
+    "repoboard_db_rows_total",
+    "Rows returned or affected by SQL statements, where the driver reports them",
+)
+DB_QUERY_SECONDS = Histogram("repoboard_db_query_duration_seconds", "SQL statement execution time")
+POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "repoboard_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKED_OUT = Gauge("repoboard_db_pool_checked_out", "Connections currently checked out of the pool")
+
+
+class QueryStats:
+    """Statements and rows run on behalf of one unit of work (an API request)."""
+    __slots__ = ("queries", "rows")
+    
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+
+# A mutable holder rather than counts, so handler threads update the request's copy
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed in this context (including threads it starts)."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach query and pool listeners to engine."""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info["query_started"].pop())
+        rows = max(cursor.rowcount, 0)  # -1 when unknown (e.g. SQLite SELECTs)
+        DB_QUERIES.inc()
+        DB_ROWS.inc(rows)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.rows += rows
+    
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+    
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc()
+    
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
@@ -1,14 +1,18 @@
 """SQLAlchemy models for RepoBoard database."""
 
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import (
     Column, Integer, String, Text, Float, Boolean, DateTime, 
-    ForeignKey, JSON, Index
+    ForeignKey, JSON, Index, LargeBinary
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 
+from shared.compression import compress_text, decompress_text, text_preview
+
 Base = declarative_base()
 
 
@@ -22,7 +26,10 @@ class Repo(Base):
     name = Column(String(255), nullable=False)
     owner = Column(String(255), nullable=False, index=True)
     description = Column(Text)
-    readme = Column(Text)
+    # zlib-compressed README, only loaded when accessed; use readme_preview where
+    # the first 2000 characters are enough
+    readme_compressed = deferred(Column(LargeBinary))
+    readme_preview = Column(Text)
     languages = Column(JSON, default=dict)
     stars = Column(Integer, default=0, index=True)
     forks = Column(Integer, default=0)
@@ -35,10 +42,22 @@ class Repo(Base):
     topics = Column(JSON, default=list)
     license = Column(String(100))
     archived = Column(Boolean, default=False, index=True)
-    file_tree = Column(JSON)
+    # Compact, compressed tree (see shared.file_tree); only loaded when accessed
+    file_tree_compact = deferred(Column(LargeBinary))
+    file_tree_features = Column(JSON)  # File count, size, extensions, tests/docs/CI flags
     commit_count = Column(Integer, default=0)
     contributor_count = Column(Integer, default=0)
-    star_velocity = Column(Float, default=0.0, index=True)
+    star_velocity = Column(Float, default=0.0, index=True)  # Lifetime stars per day
+    # Windowed stars per day from repo_star_snapshots; None until there is history
+    star_velocity_1d = Column(Float)
+    star_velocity_7d = Column(Float, index=True)
+    star_velocity_30d = Column(Float)
+    content_hashes = Column(JSON, default=dict)  # Per-field SHA-256 of fetched content
+    content_hash = Column(String(64), index=True)  # Combined hash of summary/embedding inputs
+    embedding_updated_at = Column(DateTime)  # Last time the vector was written to Qdrant
+    neighbors_updated_at = Column(DateTime, index=True)  # Last time repo_neighbors was computed
+    # Weighted name/description/topics/summary/tags vector (see db.search); PostgreSQL only
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql")))
     created_at_db = Column(DateTime, server_default=func.now())
     updated_at_db = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -49,6 +68,36 @@ class Repo(Base):
     __table_args__ = (
         Index("idx_repo_stars_velocity", "stars", "star_velocity"),
         Index("idx_repo_updated", "updated_at_db"),
+        # (sort key, id) pairs for keyset pagination (see api.pagination)
+        Index("idx_repo_stars_id", "stars", "id"),
+        Index("idx_repo_velocity_id", "star_velocity", "id"),
+        Index("idx_repo_created_id", "created_at", "id"),
+        Index("idx_repo_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    
+    @property
+    def readme(self) -> Optional[str]:
+        """Full README text (loads and decompresses the deferred column)."""
+        return decompress_text(self.readme_compressed)
+    
+    @readme.setter
+    def readme(self, value: Optional[str]):
+        self.readme_compressed = compress_text(value)
+        self.readme_preview = text_preview(value)
+
+
+class RepoStarSnapshot(Base):
+    """Append-only star count sample taken on each ingest."""
+    __tablename__ = "repo_star_snapshots"
+    
+    id = Column(Integer, primary_key=True)
+    repo_id = Column(Integer, ForeignKey("repos.id"), nullable=False)
+    captured_at = Column(DateTime, nullable=False)
+    stars = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("idx_star_snapshot_repo_time", "repo_id", "captured_at"),
+        Index("idx_star_snapshot_time", "captured_at"),
     )
 
 
@@ -66,6 +115,7 @@ class RepoSummary(Base):
     project_health = Column(String(50), nullable=False, index=True)
     project_health_score = Column(Float, nullable=False)
     use_cases = Column(JSON, default=list)
+    source_hash = Column(String(64))  # Repo.content_hash the summary was generated from
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -148,4 +198,114 @@ class CurationScore(Base):
     difficulty_weight = Column(Float, nullable=False)
     total_score = Column(Float, nullable=False, index=True)
     computed_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_score_total_repo", "total_score", "repo_id"),
+    )
+
+
+class GitHubResponseCache(Base):
+    """Cached GitHub API response for conditional (ETag) requests."""
+    __tablename__ = "github_response_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(1000), unique=True, nullable=False, index=True)
+    etag = Column(String(255))
+    last_modified = Column(String(100))
+    body = Column(JSON)
+    fetched_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class IngestionRun(Base):
+    """Durable journal of one trending ingestion run, used to resume after a crash."""
+    __tablename__ = "ingestion_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(36), unique=True, nullable=False, index=True)
+    language = Column(String(100))
+    status = Column(String(20), nullable=False, default="running", index=True)  # running, completed
+    candidate_count = Column(Integer, default=0)
+    started_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime)
+    
+    # Relationships
+    items = relationship("IngestionRunItem", back_populates="run", cascade="all, delete-orphan")
+
+
+class IngestionRunItem(Base):
+    """Candidate repository of an ingestion run and its completion state."""
+    __tablename__ = "ingestion_run_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("ingestion_runs.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    url = Column(String(500), nullable=False)
+    repo_data = Column(JSON, nullable=False)  # Search payload, so a resumed run needs no re-search
+    status = Column(String(20), nullable=False, default="pending")  # pending, done, failed
+    repo_id = Column(Integer, ForeignKey("repos.id"))
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    run = relationship("IngestionRun", back_populates="items")
+    
+    __table_args__ = (
+        Index("idx_run_item_url", "run_id", "url", unique=True),
+        Index("idx_run_item_status", "run_id", "status"),
+    )
+
+
+class DataGeneration(Base):
+    """Monotonic counter bumped whenever served data changes; keys API response caches."""
+    __tablename__ = "data_generations"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class QueryEmbedding(Base):
+    """Cached embedding of a normalized search query."""
+    __tablename__ = "query_embeddings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    query_hash = Column(String(64), unique=True, nullable=False, index=True)  # SHA-256 of model + query
+    query = Column(String(500), nullable=False)
+    model = Column(String(100), nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 array
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now(), index=True)
+
+
+class RepoNeighbor(Base):
+    """Precomputed nearest neighbor of a repository by embedding similarity."""
+    __tablename__ = "repo_neighbors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    repo_id = Column(Integer, ForeignKey("repos.id", ondelete="CASCADE"), nullable=False)
+    neighbor_id = Column(Integer, ForeignKey("repos.id", ondelete="CASCADE"), nullable=False, index=True)
+    rank = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)  # Cosine similarity
+    computed_at = Column(DateTime, server_default=func.now())
+    
+    neighbor = relationship("Repo", foreign_keys=[neighbor_id])
+    
+    __table_args__ = (
+        Index("idx_neighbor_repo_rank", "repo_id", "rank"),
+        Index("idx_neighbor_pair", "repo_id", "neighbor_id", unique=True),
+    )
+
+
+class StatsSnapshot(Base):
+    """Materialized /stats counters (single row), kept current by writers (see db.stats)."""
+    __tablename__ = "stats"
+    
+    id = Column(Integer, primary_key=True)
+    total_repos = Column(Integer, nullable=False, default=0)  # Non-archived
+    total_boards = Column(Integer, nullable=False, default=0)
+    categories = Column(JSON, default=dict)  # Summary category -> count
+    languages = Column(JSON, default=dict)  # Primary language -> non-archived repo count
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    reconciled_at = Column(DateTime)
 
@@ -0,0 +1,143 @@
+"""Full-text search index over repo names, descriptions, topics, summaries and tags."""
+
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from db.models import Repo, RepoSummary
+
+
+# Field weights, shared by the Postgres tsvector (A-D labels) and the in-process fallback
+FIELD_WEIGHTS = {
+    "name": ("A", 4.0),
+    "topics": ("B", 2.0),
+    "tags": ("B", 2.0),
+    "description": ("B", 2.0),
+    "summary": ("C", 1.0),
+}
+
+SEARCH_CONFIG = "english"
+
+REFRESH_SEARCH_VECTORS_SQL = text(f"""
+    UPDATE repos SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(r.name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(r.description, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT string_agg(t, ' ') FROM json_array_elements_text(r.topics) AS t), '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT string_agg(t, ' ') FROM json_array_elements_text(s.tags) AS t), '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(s.summary, '')), 'C')
+    FROM repos r
+    LEFT JOIN repo_summaries s ON s.repo_id = r.id
+    WHERE repos.id = r.id AND r.id IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def uses_tsvector(db: Session) -> bool:
+    """Whether the database maintains Repo.search_vector (PostgreSQL only)."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def refresh_search_vectors(db: Session, repo_ids: Iterable[int]) -> None:
+    """
+    Recompute search_vector for the given repos inside the caller's transaction.
+    No-op on databases without tsvector; the in-process index rebuilds from the
+    data generation instead.
+    """
+    repo_ids = list(set(repo_ids))
+    if not repo_ids or not uses_tsvector(db):
+        return
+    db.flush()
+    db.execute(REFRESH_SEARCH_VECTORS_SQL, {"ids": repo_ids})
+
+
+def tokenize(value) -> List[str]:
+    """Lowercase alphanumeric tokens from a string or list of strings."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(item) for item in value)
+    return TOKEN_PATTERN.findall(value.lower())
+
+
+class InvertedIndex:
+    """
+    In-process inverted index used when the database has no tsvector support
+    (SQLite, tests). Matches every query term and ranks by weighted TF-IDF.
+    """
+    
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_count = 0
+        self.generation: Optional[int] = None
+    
+    def add(self, repo_id: int, fields: Dict[str, object]) -> None:
+        """Index one repo's searchable fields."""
+        self.doc_count += 1
+        for field, value in fields.items():
+            weight = FIELD_WEIGHTS[field][1]
+            for token in tokenize(value):
+                postings = self.postings[token]
+                postings[repo_id] = postings.get(repo_id, 0.0) + weight
+    
+    def search(self, query: str) -> List[Tuple[float, int]]:
+        """Return (score, repo_id) for repos containing every query term, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                return []
+            idf = math.log(1 + self.doc_count / len(postings))
+            if scores is None:
+                scores = {repo_id: weight * idf for repo_id, weight in postings.items()}
+            else:
+                scores = {
+                    repo_id: score + postings[repo_id] * idf
+                    for repo_id, score in scores.items()
+                    if repo_id in postings
+                }
+        return sorted(((score, repo_id) for repo_id, score in scores.items()), reverse=True)
+
+
+def build_inverted_index(db: Session) -> InvertedIndex:
+    """Build an InvertedIndex over all non-archived repos."""
+    index = InvertedIndex()
+    rows = db.query(
+        Repo.id, Repo.name, Repo.description, Repo.topics, RepoSummary.summary, RepoSummary.tags
+    ).outerjoin(RepoSummary, RepoSummary.repo_id == Repo.id).filter(Repo.archived == False)
+    for repo_id, name, description, topics, summary, tags in rows:
+        index.add(repo_id, {
+            "name": name,
+            "description": description,
+            "topics": topics,
+            "summary": summary,
+            "tags": tags,
+        })
+    return index
+
+
+class FallbackSearchIndex:
+    """Holds the current InvertedIndex and rebuilds it when the data generation moves."""
+    
+    def __init__(self):
+        self._index = InvertedIndex()
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session, generation: int) -> InvertedIndex:
+        if self._index.generation != generation:
+            with self._lock:
+                if self._index.generation != generation:
+                    index = build_inverted_index(db)
+                    index.generation = generation
+                    self._index = index
+        return self._index
@@ -0,0 +1,155 @@
+"""Materialized counters behind /stats, maintained by writers and reconciled periodically."""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.models import Board, Repo, RepoSummary, StatsSnapshot
+
+
+STATS_ID = 1
+
+# (archived, primary language) of a repo, or None when the repo does not exist
+RepoState = Optional[Tuple[bool, Optional[str]]]
+
+
+def primary_language(languages: Optional[Dict[str, float]]) -> Optional[str]:
+    """Language with the most bytes, as counted in the per-language breakdown."""
+    if not languages:
+        return None
+    return max(languages.items(), key=lambda item: item[1])[0]
+
+
+def repo_state(archived: Optional[bool], languages: Optional[Dict[str, float]]) -> RepoState:
+    return (bool(archived), primary_language(languages))
+
+
+def repo_deltas(changes: Iterable[Tuple[RepoState, RepoState]]) -> Tuple[int, Counter]:
+    """Change in non-archived repo count and per-language counts for (old, new) state pairs."""
+    repos = 0
+    languages: Counter = Counter()
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None or state[0]:
+                continue
+            repos += sign
+            if state[1]:
+                languages[state[1]] += sign
+    return repos, languages
+
+
+def compute_stats(db: Session) -> Dict[str, object]:
+    """Exact counters from the base tables (full scans; used for reconciliation)."""
+    languages: Counter = Counter()
+    for languages_json, in db.query(Repo.languages).filter(Repo.archived == False):
+        language = primary_language(languages_json)
+        if language:
+            languages[language] += 1
+    return {
+        "total_repos": db.query(func.count(Repo.id)).filter(Repo.archived == False).scalar(),
+        "total_boards": db.query(func.count(Board.id)).scalar(),
+        "categories": dict(
+            db.query(RepoSummary.category, func.count(RepoSummary.id)).group_by(RepoSummary.category).all()
+        ),
+        "languages": dict(languages),
+    }
+
+
+def reconcile_stats(db: Session) -> Dict[str, object]:
+    """
+    Overwrite the snapshot with exact counts and return the drift that was
+    corrected (expected minus stored) for anything that differed. The row is
+    locked before counting, so deltas already applied are committed and
+    counted, and later ones apply on top of the exact values. A writer whose
+    data committed but whose deltas had not yet landed is counted twice until
+    the next run.
+    """
+    db.flush()
+    snapshot = db.query(StatsSnapshot).filter(StatsSnapshot.id == STATS_ID).with_for_update().first()
+    exact = compute_stats(db)
+    if snapshot is None:
+        snapshot = StatsSnapshot(id=STATS_ID)
+        db.add(snapshot)
+        drift = {"created": True}
+    else:
+        drift = {}
+        for field in ("total_repos", "total_boards"):
+            if getattr(snapshot, field) != exact[field]:
+                drift[field] = exact[field] - (getattr(snapshot, field) or 0)
+        for field in ("categories", "languages"):
+            stored = getattr(snapshot, field) or {}
+            changed = {
+                key: exact[field].get(key, 0) - stored.get(key, 0)
+                for key in set(stored) | set(exact[field])
+                if exact[field].get(key, 0) != stored.get(key, 0)
+            }
+            if changed:
+                drift[field] = changed
+    snapshot.total_repos = exact["total_repos"]
+    snapshot.total_boards = exact["total_boards"]
+    snapshot.categories = exact["categories"]
+    snapshot.languages = exact["languages"]
+    snapshot.reconciled_at = datetime.utcnow()
+    return drift
+
+
+def apply_stat_deltas(
+    db: Session,
+    repos: int = 0,
+    boards: int = 0,
+    categories: Optional[Counter] = None,
+    languages: Optional[Counter] = None,
+) -> None:
+    """
+    Apply counter deltas inside the caller's transaction. The totals change
+    in one atomic UPDATE (x = x + delta); per-key counts live in JSON, so they
+    are merged under a row lock, taken only when a key changed. The row stays
+    locked until commit either way, so bulk writers apply their deltas in a
+    short transaction of their own (see RepoWriter.write). Without a snapshot
+    there is nothing to update: whoever builds it (read_stats or the
+    reconciliation job) counts from the base tables.
+    """
+    if repos or boards:
+        db.query(StatsSnapshot).filter(StatsSnapshot.id == STATS_ID).update({
+            StatsSnapshot.total_repos: StatsSnapshot.total_repos + repos,
+            StatsSnapshot.total_boards: StatsSnapshot.total_boards + boards,
+        }, synchronize_session=False)
+    if not (any((categories or {}).values()) or any((languages or {}).values())):
+        return
+    snapshot = db.query(StatsSnapshot).filter(StatsSnapshot.id == STATS_ID).with_for_update().first()
+    if snapshot is None:
+        return
+    snapshot.categories = _merge_counts(snapshot.categories, categories)
+    snapshot.languages = _merge_counts(snapshot.languages, languages)
+
+
+def _merge_counts(stored: Optional[Dict[str, int]], deltas: Optional[Counter]) -> Dict[str, int]:
+    """New dict (so the JSON column is marked dirty) with zero counts dropped."""
+    merged = dict(stored or {})
+    for key, delta in (deltas or {}).items():
+        merged[key] = merged.get(key, 0) + delta
+    return {key: count for key, count in merged.items() if count}
+
+
+def read_stats(db: Session) -> Dict[str, object]:
+    """Primary-key read of the snapshot, building it on first use."""
+    snapshot = db.query(StatsSnapshot).filter(StatsSnapshot.id == STATS_ID).first()
+    if snapshot is None:
+        try:
+            reconcile_stats(db)
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # Another request built it first
+        snapshot = db.query(StatsSnapshot).filter(StatsSnapshot.id == STATS_ID).first()
+    categories = snapshot.categories or {}
+    return {
+        "total_repos": snapshot.total_repos,
+        "total_boards": snapshot.total_boards,
+        "total_categories": len(categories),
+        "categories": categories,
+        "languages": snapshot.languages or {},
+    }
@@ -18,6 +18,7 @@ class EmbeddingService:
     def __init__(self):
         self.model = "text-embedding-3-small"
         self.dimension = 1536  # OpenAI text-embedding-3-small dimension
+        self._query_cache = None
         
         # Initialize client based on provider
         if settings.llm_provider == "openai":
@@ -48,8 +49,8 @@ class EmbeddingService:
             text_parts.append(repo.description)
         
         # Add README (truncated to first 2000 chars)
-        if repo.readme:
-            text_parts.append(repo.readme[:2000])
+        if repo.readme_preview:
+            text_parts.append(repo.readme_preview)
         
         # Add summary if available
         if summary:
@@ -92,6 +93,13 @@ class EmbeddingService:
             }]
         )
     
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing cached vectors for repeated queries."""
+        if self._query_cache is None:
+            from embedding_service.query_cache import QueryEmbeddingCache
+            self._query_cache = QueryEmbeddingCache(self._generate_embedding, self.model)
+        return self._query_cache.get(query)
+    
     def search_similar(self, query_embedding: List[float], vector_db_client, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for similar repositories using vector similarity."""
         results = vector_db_client.search(
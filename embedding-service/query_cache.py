@@ -0,0 +1,93 @@
+"""Cache of search-query embeddings so repeated queries skip the embedding call."""
+
+import sys
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import numpy as np
+from sqlalchemy.sql import func
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import get_db
+from db.models import QueryEmbedding
+from shared.config import settings
+from shared.metrics import CACHE_LOOKUPS
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the cache key."""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU in front of the query_embeddings table.
+    Vectors are stored as float32 bytes; the table survives restarts and is
+    shared by API workers, and its hit counts show which queries are popular.
+    Storage errors never fail the search, they only cost an embedding call.
+    """
+    
+    def __init__(self, embed: Callable[[str], List[float]], model: str, max_entries: Optional[int] = None):
+        self.embed = embed
+        self.model = model
+        self.max_entries = max_entries or settings.query_embedding_cache_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _key(self, normalized: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{normalized}".encode("utf-8")).hexdigest()
+    
+    def get(self, query: str) -> List[float]:
+        """Embedding for query, from memory, then the table, then the provider."""
+        normalized = normalize_query(query)
+        key = self._key(normalized)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                CACHE_LOOKUPS.inc(cache="query_embedding", result="hit")
+                return vector
+        
+        vector = self._load(key)
+        if vector is not None:
+            CACHE_LOOKUPS.inc(cache="query_embedding", result="table_hit")
+        else:
+            CACHE_LOOKUPS.inc(cache="query_embedding", result="miss")
+            vector = list(self.embed(normalized))
+            self._store(key, normalized, vector)
+        
+        with self._lock:
+            self._entries[key] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+    
+    def _load(self, key: str) -> Optional[List[float]]:
+        try:
+            with get_db() as db:
+                entry = db.query(QueryEmbedding).filter(QueryEmbedding.query_hash == key).first()
+                if not entry:
+                    return None
+                entry.hit_count = QueryEmbedding.hit_count + 1
+                entry.last_used_at = func.now()
+                return np.frombuffer(entry.vector, dtype=np.float32).tolist()
+        except Exception as e:
+            print(f"Query embedding cache read failed: {e}")
+            return None
+    
+    def _store(self, key: str, normalized: str, vector: List[float]):
+        try:
+            with get_db() as db:
+                db.add(QueryEmbedding(
+                    query_hash=key,
+                    query=normalized[:500],
+                    model=self.model,
+                    vector=np.asarray(vector, dtype=np.float32).tobytes(),
+                ))
+        except Exception as e:
+            # Usually a concurrent insert of the same query
+            print(f"Query embedding cache write failed: {e}")
@@ -79,6 +79,15 @@ class QdrantClient:
             for result in results
         ]
     
+    def get_vectors(self, collection_name: str, point_ids: List[int]) -> Dict[int, List[float]]:
+        """Fetch stored vectors by point id; ids without a point are omitted."""
+        records = self.client.retrieve(
+            collection_name=collection_name,
+            ids=point_ids,
+            with_vectors=True
+        )
+        return {int(record.id): record.vector for record in records}
+    
     def delete(self, collection_name: str, point_ids: List[int]):
         """Delete points from collection."""
         self.client.delete(
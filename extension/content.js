@@ -22,8 +22,9 @@ async function addSimilarRepos() {
   }
   
   try {
-    // Search for similar repos
-    const response = await fetch(`${apiUrl}/search?q=${repoName}&limit=5`);
+    // Precomputed nearest neighbors for this repo
+    const response = await fetch(`${apiUrl}/repos/${repoName}/similar?limit=5&view=card`);
+    if (!response.ok) return;
     const repos = await response.json();
     
     if (repos.length === 0) return;
@@ -0,0 +1,94 @@
+"""Change detection for incremental ingestion."""
+
+import hashlib
+import json
+import sys
+import os
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Iterable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, or_
+
+from db.models import Repo, RepoSummary
+from shared.schemas import RepoMetadata
+
+
+# Fields whose content is hashed on every write
+HASHED_FIELDS = ("description", "readme", "languages", "topics", "file_tree_compact")
+
+# Fields that feed summarization and embedding; their hashes make up content_hash
+SUMMARY_FIELDS = ("description", "readme", "languages", "topics")
+
+# Fields that are only refreshed when the repo has been pushed to
+EXPENSIVE_FIELDS = (
+    "readme", "languages", "file_tree_compact", "file_tree_features",
+    "commit_count", "contributor_count",
+)
+
+
+def hash_value(value: Any) -> str:
+    """Return a stable SHA-256 hex digest for a JSON-serializable value."""
+    encoded = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an ISO timestamp or datetime into naive UTC for comparison."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def content_changed(repo_data: Dict[str, Any], stored: Optional[Dict[str, Any]]) -> bool:
+    """
+    Decide whether README, languages and file tree need refetching.
+    Content only moves on push, so pushed_at is compared first and
+    updated_at is used when the payload has no pushed_at. Rows written
+    before content hashes existed always count as changed.
+    """
+    if not stored or not stored.get("content_hashes"):
+        return True
+    
+    for field in ("pushed_at", "updated_at"):
+        remote = _parse_timestamp(repo_data.get(field))
+        if remote is None:
+            continue
+        local = _parse_timestamp(stored.get(field))
+        return local is None or remote > local
+    return True
+
+
+def apply_content_hashes(metadata: RepoMetadata, previous: Optional[Dict[str, str]] = None,
+                         fields: Iterable[str] = HASHED_FIELDS) -> RepoMetadata:
+    """
+    Hash the given fields of metadata and carry over the previous hashes
+    for fields that were not refetched, then recompute content_hash.
+    """
+    hashes = dict(previous or {})
+    for field in fields:
+        hashes[field] = hash_value(getattr(metadata, field))
+    metadata.content_hashes = hashes
+    metadata.content_hash = hash_value([hashes.get(field) for field in SUMMARY_FIELDS])
+    return metadata
+
+
+def needs_summary_filter():
+    """
+    Filter for repos that have no summary, or whose summary was generated
+    from different content. Summaries written before source hashes existed
+    (NULL source_hash) count as stale once the repo has a content hash.
+    Expects Repo outer-joined to RepoSummary.
+    """
+    return or_(
+        RepoSummary.id == None,
+        and_(
+            Repo.content_hash != None,
+            or_(RepoSummary.source_hash == None, RepoSummary.source_hash != Repo.content_hash),
+        ),
+    )
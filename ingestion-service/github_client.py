@@ -1,9 +1,11 @@
 """GitHub API client for fetching repository data."""
 
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Set
 from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import threading
 import sys
 import os
 
@@ -12,51 +14,146 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.config import settings
 from shared.schemas import RepoMetadata
+from shared.file_tree import encode_file_tree, file_tree_features
+from ingestion_service.graphql_queries import build_repos_query, README_ALIASES
+from ingestion_service.rate_limiter import RateLimitScheduler
+
+
+# Repo fields the batch GraphQL query cannot return
+GRAPHQL_UNFETCHED_FIELDS = ("file_tree_compact", "file_tree_features", "contributor_count")
 
 
 class GitHubClient:
     """Client for interacting with GitHub API."""
     
     BASE_URL = "https://api.github.com"
+    MAX_RATE_LIMIT_RETRIES = 5
     
-    def __init__(self, token: Optional[str] = None):
-        self.token = token or settings.github_token
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, cache: Optional[Any] = None,
+                 use_graphql: Optional[bool] = None, tokens: Optional[List[str]] = None):
+        self.tokens = tokens or ([token] if token else settings.github_token_pool())
+        self.token = self.tokens[0] if self.tokens else None
+        self.cache = cache  # Optional ResponseCache for conditional requests
+        # The GraphQL API requires authentication, so batch mode needs a token
+        self.use_graphql = (settings.github_use_graphql if use_graphql is None else use_graphql) and bool(self.token)
+        self.base_url = (base_url or settings.github_api_url or self.BASE_URL).rstrip("/")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
         }
-        if self.token:
-            self.headers["Authorization"] = f"token {self.token}"
-        self.rate_limit_remaining = 5000
-        self.rate_limit_reset = 0
-    
-    def _check_rate_limit(self):
-        """Check and wait if rate limit is reached."""
-        if self.rate_limit_remaining < 10:
-            wait_time = max(0, self.rate_limit_reset - time.time() + 1)
-            if wait_time > 0:
-                print(f"Rate limit reached. Waiting {wait_time:.0f} seconds...")
-                time.sleep(wait_time)
-    
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make a request to GitHub API with rate limiting."""
-        self._check_rate_limit()
-        url = f"{self.BASE_URL}{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
-        
-        # Update rate limit info
-        if "X-RateLimit-Remaining" in response.headers:
-            self.rate_limit_remaining = int(response.headers["X-RateLimit-Remaining"])
-        if "X-RateLimit-Reset" in response.headers:
-            self.rate_limit_reset = int(response.headers["X-RateLimit-Reset"])
+        
+        # Every request is routed to the token with the most headroom
+        self.scheduler = RateLimitScheduler(self.tokens)
+        
+        # Concurrency: at most max_concurrency requests are in flight at once
+        self.max_concurrency = max(1, max_concurrency or settings.github_max_concurrency)
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="github-fetch"
+        )
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def _send(self, method: str, url: str, resource: str = "core",
+              headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Send a request on the token the scheduler picks, retrying on another
+        token when GitHub answers with a primary or secondary rate limit.
+        """
+        for _ in range(self.MAX_RATE_LIMIT_RETRIES):
+            bucket = self.scheduler.acquire(resource)
+            request_headers = dict(self.headers, **(headers or {}))
+            if bucket.token:
+                request_headers["Authorization"] = f"token {bucket.token}"
+            
+            with self._request_slots:
+                response = self.session.request(method, url, headers=request_headers, **kwargs)
+            
+            if not self.scheduler.update(bucket, response):
+                return response
+        return response
+    
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None, raw: bool = False) -> Any:
+        """
+        Make a request to GitHub API with rate limiting.
+        When a response cache is configured, stored validators are sent as
+        If-None-Match / If-Modified-Since and a 304 is served from the cache
+        (GitHub does not count 304s against the rate limit).
+        With `raw`, the raw media type is requested and the body is returned as text.
+        """
+        url = requests.Request("GET", f"{self.base_url}{endpoint}", params=params).prepare().url
+        headers = {"Accept": "application/vnd.github.raw"} if raw else {}
+        cache_key = f"{url}#raw" if raw else url
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        resource = "search" if endpoint.startswith("/search/") else "core"
+        response = self._send("GET", url, resource=resource, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached["body"]
         
         response.raise_for_status()
-        return response.json()
+        data = response.text if raw else response.json()
+        
+        if self.cache:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.cache.set(cache_key, etag, last_modified, data)
+        return data
+    
+    def _make_graphql_request(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a GraphQL query against the GitHub API with rate limiting."""
+        response = self._send(
+            "POST",
+            f"{self.base_url}/graphql",
+            resource="graphql",
+            json={"query": query, "variables": variables},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        # Missing repos come back as null aliases plus an error entry; only
+        # fail the whole batch if no data was returned at all.
+        if payload.get("errors") and not payload.get("data"):
+            raise RuntimeError(f"GraphQL error: {payload['errors'][0].get('message')}")
+        return payload.get("data") or {}
+    
+    def close(self):
+        """Shut down the fetch thread pool and HTTP session."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
     
     def get_trending_repos(self, language: Optional[str] = None, since: str = "daily") -> List[Dict[str, Any]]:
         """
         Get trending repositories.
         Note: GitHub doesn't have an official trending API, so this uses search with sorting.
         """
+        return list(self.iter_trending_repos(language=language, since=since, max_pages=5))  # Top 500 repos
+    
+    def iter_trending_repos(self, language: Optional[str] = None, since: str = "daily",
+                            max_pages: int = 10) -> Iterator[Dict[str, Any]]:
+        """
+        Yield trending repositories one search hit at a time, fetching the
+        next page only when the previous one has been consumed.
+        """
+        for items in self.iter_trending_pages(language=language, since=since, max_pages=max_pages):
+            yield from items
+    
+    def iter_trending_pages(self, language: Optional[str] = None, since: str = "daily",
+                            max_pages: int = 10) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield trending repositories one search page at a time, fetching the
+        next page only when the previous one has been consumed.
+        GitHub search returns at most 1000 results (10 pages of 100).
+        """
         query_parts = ["stars:>100"]
         if language:
             query_parts.append(f"language:{language}")
@@ -69,18 +166,18 @@ class GitHubClient:
             "per_page": 100,
         }
         
-        results = []
-        for page in range(1, 6):  # Get top 500 repos
+        for page in range(1, max_pages + 1):
             params["page"] = page
             try:
                 data = self._make_request("/search/repositories", params)
-                results.extend(data.get("items", []))
-                time.sleep(0.5)  # Be nice to API
             except Exception as e:
                 print(f"Error fetching page {page}: {e}")
-                break
-        
-        return results
+                return
+            items = data.get("items", [])
+            if items:
+                yield items
+            if len(items) < params["per_page"]:
+                return
     
     def get_repo_details(self, owner: str, repo: str) -> Dict[str, Any]:
         """Get detailed information about a repository."""
@@ -89,10 +186,8 @@ class GitHubClient:
     def get_repo_readme(self, owner: str, repo: str) -> Optional[str]:
         """Get README content for a repository."""
         try:
-            data = self._make_request(f"/repos/{owner}/{repo}/readme")
-            import base64
-            content = base64.b64decode(data["content"]).decode("utf-8")
-            return content
+            # The raw media type skips the JSON envelope and base64 decode
+            return self._make_request(f"/repos/{owner}/{repo}/readme", raw=True)
         except Exception:
             return None
     
@@ -106,7 +201,7 @@ class GitHubClient:
             return {}
     
     def get_repo_file_tree(self, owner: str, repo: str, branch: str = "main") -> Optional[Dict[str, Any]]:
-        """Get file tree structure for a repository."""
+        """Get the compact file tree and its derived features for a repository."""
         try:
             data = self._make_request(f"/repos/{owner}/{repo}/git/trees/{branch}?recursive=1")
             return self._parse_file_tree(data.get("tree", []))
@@ -114,39 +209,46 @@ class GitHubClient:
             return None
     
     def _parse_file_tree(self, tree: List[Dict]) -> Dict[str, Any]:
-        """Parse GitHub tree structure into a hierarchical format."""
-        result = {}
-        for item in tree:
-            path_parts = item["path"].split("/")
-            current = result
-            for part in path_parts[:-1]:
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
-            current[path_parts[-1]] = {
-                "type": item["type"],
-                "size": item.get("size", 0),
-            }
-        return result
+        """Parse GitHub tree listing into a compact encoding plus precomputed features."""
+        return {
+            "compact": encode_file_tree(tree),
+            "features": file_tree_features(tree),
+        }
+    
+    def _count_items(self, endpoint: str, params: Optional[Dict] = None) -> int:
+        """
+        Count the items of a paginated list endpoint with a single request.
+        With one item per page, the page number of the Link header's
+        rel="last" URL is the total; without a Link header there is at most
+        one page.
+        """
+        params = dict(params or {}, per_page=1)
+        url = requests.Request("GET", f"{self.base_url}{endpoint}", params=params).prepare().url
+        response = self._send("GET", url)
+        if response.status_code in (204, 409):  # No content / empty repository
+            return 0
+        response.raise_for_status()
+        
+        last_url = response.links.get("last", {}).get("url")
+        if last_url:
+            return int(parse_qs(urlparse(last_url).query)["page"][0])
+        data = response.json()
+        return len(data) if isinstance(data, list) else 0
     
     def get_repo_commits(self, owner: str, repo: str, since: Optional[datetime] = None) -> int:
-        """Get commit count (approximate)."""
+        """Get commit count on the default branch."""
         try:
-            params = {"per_page": 1}
+            params = {}
             if since:
                 params["since"] = since.isoformat()
-            data = self._make_request(f"/repos/{owner}/{repo}/commits", params)
-            # Get total from Link header if available, otherwise estimate
-            return len(data) if isinstance(data, list) else 0
+            return self._count_items(f"/repos/{owner}/{repo}/commits", params)
         except Exception:
             return 0
     
     def get_repo_contributors(self, owner: str, repo: str) -> int:
-        """Get contributor count."""
+        """Get contributor count, including anonymous contributors."""
         try:
-            data = self._make_request(f"/repos/{owner}/{repo}/contributors", {"per_page": 1, "anon": "true"})
-            # This is an approximation - GitHub doesn't return total count easily
-            return len(data) if isinstance(data, list) else 0
+            return self._count_items(f"/repos/{owner}/{repo}/contributors", {"anon": "true"})
         except Exception:
             return 0
     
@@ -164,10 +266,30 @@ class GitHubClient:
         owner = repo_data["owner"]["login"]
         name = repo_data["name"]
         
-        # Fetch additional data
-        readme = self.get_repo_readme(owner, name)
-        languages = self.get_repo_languages(owner, name)
-        file_tree = self.get_repo_file_tree(owner, name, repo_data.get("default_branch", "main"))
+        # Fetch additional data concurrently
+        readme_future = self._executor.submit(self.get_repo_readme, owner, name)
+        languages_future = self._executor.submit(self.get_repo_languages, owner, name)
+        file_tree_future = self._executor.submit(
+            self.get_repo_file_tree, owner, name, repo_data.get("default_branch", "main")
+        )
+        commits_future = self._executor.submit(self.get_repo_commits, owner, name)
+        contributors_future = self._executor.submit(self.get_repo_contributors, owner, name)
+        return self.build_repo_metadata(
+            repo_data,
+            readme=readme_future.result(),
+            languages=languages_future.result(),
+            file_tree=file_tree_future.result(),
+            commit_count=commits_future.result(),
+            contributor_count=contributors_future.result(),
+        )
+    
+    def build_repo_metadata(self, repo_data: Dict[str, Any], readme: Optional[str] = None,
+                            languages: Optional[Dict[str, float]] = None,
+                            file_tree: Optional[Dict[str, Any]] = None,
+                            commit_count: int = 0, contributor_count: int = 0) -> RepoMetadata:
+        """Build RepoMetadata from a search/details payload without extra requests."""
+        owner = repo_data["owner"]["login"]
+        name = repo_data["name"]
         
         # Parse dates
         created_at = datetime.fromisoformat(repo_data["created_at"].replace("Z", "+00:00")) if repo_data.get("created_at") else None
@@ -183,7 +305,7 @@ class GitHubClient:
             owner=owner,
             description=repo_data.get("description"),
             readme=readme,
-            languages=languages,
+            languages=languages or {},
             stars=repo_data.get("stargazers_count", 0),
             forks=repo_data.get("forks_count", 0),
             watchers=repo_data.get("watchers_count", 0),
@@ -195,9 +317,134 @@ class GitHubClient:
             topics=repo_data.get("topics", []),
             license=repo_data.get("license", {}).get("name") if repo_data.get("license") else None,
             archived=repo_data.get("archived", False),
-            file_tree=file_tree,
-            commit_count=0,  # Would need pagination to get accurate count
-            contributor_count=0,  # Would need pagination
+            file_tree_compact=file_tree["compact"] if file_tree else None,
+            file_tree_features=file_tree["features"] if file_tree else None,
+            commit_count=commit_count,
+            contributor_count=contributor_count,
             star_velocity=star_velocity,
         )
-
+    
+    def fetch_repos_metadata(self, repos_data: List[Dict[str, Any]]) -> List[Optional[RepoMetadata]]:
+        """
+        Fetch complete metadata for many repositories concurrently.
+        Results are returned in input order; repos that fail to fetch are None.
+        """
+        if self.use_graphql:
+            return self.fetch_repos_metadata_graphql(repos_data)
+        
+        def fetch(repo_data: Dict[str, Any]) -> Optional[RepoMetadata]:
+            try:
+                return self.fetch_repo_metadata(repo_data)
+            except Exception as e:
+                print(f"Error fetching {repo_data.get('full_name', 'unknown')}: {e}")
+                return None
+        
+        # Repo-level workers only wait on sub-requests submitted to self._executor,
+        # so they run in their own pool to avoid starving it.
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="github-repo") as pool:
+            return list(pool.map(fetch, repos_data))
+    
+    def unfetched_fields(self, metadata: RepoMetadata) -> Set[str]:
+        """
+        Fields of a fetch_repos_metadata record that were not fetched and must
+        not overwrite stored values: in batch mode the file tree and
+        contributor count, and the README when none of README_ALIASES matched.
+        """
+        if not self.use_graphql:
+            return set()
+        missing = set(GRAPHQL_UNFETCHED_FIELDS)
+        if metadata.readme is None:
+            missing.add("readme")
+        return missing
+    
+    def _graphql_to_metadata(self, node: Dict[str, Any]) -> RepoMetadata:
+        """Convert a GraphQL repository node into RepoMetadata."""
+        languages_data = node.get("languages") or {}
+        total_size = languages_data.get("totalSize") or 0
+        languages = {
+            edge["node"]["name"]: edge["size"] / total_size
+            for edge in languages_data.get("edges", [])
+        } if total_size > 0 else {}
+        
+        readme = None
+        for alias in README_ALIASES:
+            blob = node.get(alias)
+            if blob and blob.get("text") is not None:
+                readme = blob["text"]
+                break
+        
+        # Parse dates
+        created_at = datetime.fromisoformat(node["createdAt"].replace("Z", "+00:00")) if node.get("createdAt") else None
+        updated_at = datetime.fromisoformat(node["updatedAt"].replace("Z", "+00:00")) if node.get("updatedAt") else None
+        pushed_at = datetime.fromisoformat(node["pushedAt"].replace("Z", "+00:00")) if node.get("pushedAt") else None
+        
+        star_velocity = self.calculate_star_velocity({
+            "created_at": node["createdAt"],
+            "stargazers_count": node.get("stargazerCount", 0),
+        }) if node.get("createdAt") else 0.0
+        
+        default_branch = (node.get("defaultBranchRef") or {}).get("name", "main")
+        topics = [t["topic"]["name"] for t in (node.get("repositoryTopics") or {}).get("nodes", [])]
+        
+        return RepoMetadata(
+            url=node["url"],
+            full_name=node["nameWithOwner"],
+            name=node["name"],
+            owner=node["owner"]["login"],
+            description=node.get("description"),
+            readme=readme,
+            languages=languages,
+            stars=node.get("stargazerCount", 0),
+            forks=node.get("forkCount", 0),
+            watchers=(node.get("watchers") or {}).get("totalCount", 0),
+            open_issues=(node.get("issues") or {}).get("totalCount", 0),
+            created_at=created_at,
+            updated_at=updated_at,
+            pushed_at=pushed_at,
+            default_branch=default_branch,
+            topics=topics,
+            license=(node.get("licenseInfo") or {}).get("name"),
+            archived=node.get("isArchived", False),
+            file_tree_compact=None,  # Not available in batch mode; see unfetched_fields
+            commit_count=(((node.get("defaultBranchRef") or {}).get("target") or {}).get("history") or {}).get("totalCount", 0),
+            contributor_count=0,  # Not exposed by GraphQL; see unfetched_fields
+            star_velocity=star_velocity,
+        )
+    
+    def fetch_repos_metadata_graphql(self, repos_data: List[Dict[str, Any]],
+                                     batch_size: Optional[int] = None) -> List[Optional[RepoMetadata]]:
+        """
+        Fetch metadata for many repositories with one GraphQL query per batch.
+        Accepts the same repo dicts as fetch_repo_metadata (owner.login and name)
+        and returns results in input order; repos that fail to resolve are None.
+        No REST calls are made, so some fields stay empty; write records with
+        unfetched_fields excluded to keep their stored values.
+        """
+        batch_size = batch_size or settings.github_graphql_batch_size
+        batches = [repos_data[i:i + batch_size] for i in range(0, len(repos_data), batch_size)]
+        
+        def fetch_batch(batch: List[Dict[str, Any]]) -> List[Optional[RepoMetadata]]:
+            variables = {}
+            for i, repo_data in enumerate(batch):
+                variables[f"owner{i}"] = repo_data["owner"]["login"]
+                variables[f"name{i}"] = repo_data["name"]
+            try:
+                data = self._make_graphql_request(build_repos_query(len(batch)), variables)
+            except Exception as e:
+                print(f"Error fetching GraphQL batch of {len(batch)} repos: {e}")
+                return [None] * len(batch)
+            
+            results = []
+            for i, repo_data in enumerate(batch):
+                node = data.get(f"r{i}")
+                try:
+                    results.append(self._graphql_to_metadata(node) if node else None)
+                except Exception as e:
+                    print(f"Error parsing {repo_data.get('full_name', 'unknown')}: {e}")
+                    results.append(None)
+            return results
+        
+        results: List[Optional[RepoMetadata]] = []
+        for batch_results in self._executor.map(fetch_batch, batches):
+            results.extend(batch_results)
+        return results
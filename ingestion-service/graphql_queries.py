@@ -0,0 +1,45 @@
+"""GraphQL query templates for batched GitHub metadata fetches."""
+
+# Fields fetched for each repository alias in a batch query.
+# README text comes from the default branch (HEAD); the common file names
+# are tried in order and the first blob found is used.
+REPO_FIELDS_FRAGMENT = """
+fragment RepoFields on Repository {
+  url
+  nameWithOwner
+  name
+  owner { login }
+  description
+  stargazerCount
+  forkCount
+  watchers { totalCount }
+  issues(states: OPEN) { totalCount }
+  createdAt
+  updatedAt
+  pushedAt
+  defaultBranchRef { name target { ... on Commit { history { totalCount } } } }
+  repositoryTopics(first: 20) { nodes { topic { name } } }
+  licenseInfo { name }
+  isArchived
+  languages(first: 20, orderBy: {field: SIZE, direction: DESC}) {
+    totalSize
+    edges { size node { name } }
+  }
+  readmeMd: object(expression: "HEAD:README.md") { ... on Blob { text } }
+  readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+  readmeRst: object(expression: "HEAD:README.rst") { ... on Blob { text } }
+  readmePlain: object(expression: "HEAD:README") { ... on Blob { text } }
+}
+"""
+
+README_ALIASES = ["readmeMd", "readmeLower", "readmeRst", "readmePlain"]
+
+# One aliased repository() lookup per repo in the batch: r0, r1, ...
+REPO_ALIAS_TEMPLATE = "  r{index}: repository(owner: $owner{index}, name: $name{index}) {{ ...RepoFields }}"
+
+
+def build_repos_query(count: int) -> str:
+    """Build a batch query for `count` repositories with owner/name variables."""
+    variables = ", ".join(f"$owner{i}: String!, $name{i}: String!" for i in range(count))
+    aliases = "\n".join(REPO_ALIAS_TEMPLATE.format(index=i) for i in range(count))
+    return f"query({variables}) {{\n{aliases}\n  rateLimit {{ cost remaining resetAt }}\n}}\n{REPO_FIELDS_FRAGMENT}"
@@ -2,14 +2,26 @@
 
 import sys
 import os
-from typing import List, Optional
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.connection import get_db, init_db
+from db.generation import bump_generation
+from db.search import refresh_search_vectors
+from db.stats import apply_stat_deltas, repo_deltas, repo_state
 from db.models import Repo
 from ingestion_service.github_client import GitHubClient
+from ingestion_service.response_cache import ResponseCache
+from ingestion_service.repo_writer import RepoWriter, EXCLUDED_FIELDS
+from ingestion_service.journal import IngestionJournal
+from ingestion_service.pipeline import StreamingPipeline
+from ingestion_service.change_detection import (
+    content_changed, apply_content_hashes, HASHED_FIELDS, EXPENSIVE_FIELDS
+)
+from shared.config import settings
 from shared.schemas import RepoMetadata
 
 
@@ -17,7 +29,10 @@ class RepoIngester:
     """Service for ingesting GitHub repositories."""
     
     def __init__(self, github_token: Optional[str] = None):
-        self.github_client = GitHubClient(github_token)
+        cache = ResponseCache() if settings.github_response_cache else None
+        self.github_client = GitHubClient(github_token, cache=cache)
+        self.writer = RepoWriter()
+        self.journal = IngestionJournal()
     
     def ingest_repo(self, repo_url: str) -> Optional[Repo]:
         """Ingest a single repository by URL."""
@@ -32,69 +47,177 @@ class RepoIngester:
         try:
             # Fetch repo data
             repo_data = self.github_client.get_repo_details(owner, name)
-            metadata = self.github_client.fetch_repo_metadata(repo_data)
+            metadata = apply_content_hashes(self.github_client.fetch_repo_metadata(repo_data))
             
             # Save to database
+            repo_id = self.writer.write([metadata])[0]
             with get_db() as db:
-                # Check if repo already exists
-                existing = db.query(Repo).filter(Repo.url == str(metadata.url)).first()
-                
-                if existing:
-                    # Update existing repo
-                    for key, value in metadata.dict(exclude={"id", "created_at_db", "updated_at_db"}).items():
-                        setattr(existing, key, value)
-                    existing.updated_at_db = datetime.utcnow()
-                    db.commit()
-                    return existing
-                else:
-                    # Create new repo
-                    repo = Repo(**metadata.dict(exclude={"id", "created_at_db", "updated_at_db"}))
-                    db.add(repo)
-                    db.commit()
-                    db.refresh(repo)
-                    return repo
+                return db.query(Repo).filter(Repo.id == repo_id).first()
         except Exception as e:
             print(f"Error ingesting {repo_url}: {e}")
             return None
     
-    def ingest_trending(self, language: Optional[str] = None, limit: int = 100) -> List[Repo]:
-        """Ingest trending repositories."""
-        print(f"Fetching trending repos (language={language}, limit={limit})...")
-        trending_repos = self.github_client.get_trending_repos(language=language)
+    def _load_stored_state(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load the change-detection columns for the given repo URLs in one query."""
+        with get_db() as db:
+            rows = db.query(
+                Repo.url, Repo.pushed_at, Repo.updated_at, Repo.content_hashes
+            ).filter(Repo.url.in_(urls)).all()
+            return {
+                row.url: {
+                    "pushed_at": row.pushed_at,
+                    "updated_at": row.updated_at,
+                    "content_hashes": row.content_hashes or {},
+                }
+                for row in rows
+            }
+    
+    def _build_unchanged_metadata(self, repo_data: Dict[str, Any], stored: Dict[str, Any]):
+        """Build metadata for an unchanged repo from its payload, keeping stored content hashes."""
+        metadata = self.github_client.build_repo_metadata(repo_data)
+        cheap_fields = [field for field in HASHED_FIELDS if field not in EXPENSIVE_FIELDS]
+        return apply_content_hashes(metadata, stored["content_hashes"], fields=cheap_fields)
+    
+    def _ingest_candidates(self, run_id: str, candidates: List[Dict[str, Any]],
+                           incremental: bool) -> List[int]:
+        """Fetch and write one checkpoint's worth of candidates, then journal the outcome."""
+        stored = self._load_stored_state([r["html_url"] for r in candidates]) if incremental else {}
+        changed, unchanged = [], []
+        for repo_data in candidates:
+            if not incremental or content_changed(repo_data, stored.get(repo_data["html_url"])):
+                changed.append(repo_data)
+            else:
+                unchanged.append(repo_data)
         
-        ingested = []
-        for repo_data in trending_repos[:limit]:
-            try:
-                metadata = self.github_client.fetch_repo_metadata(repo_data)
-                
-                with get_db() as db:
-                    existing = db.query(Repo).filter(Repo.url == str(metadata.url)).first()
-                    
-                    if existing:
-                        # Update
-                        for key, value in metadata.dict(exclude={"id", "created_at_db", "updated_at_db"}).items():
-                            setattr(existing, key, value)
-                        existing.updated_at_db = datetime.utcnow()
-                        db.commit()
-                        ingested.append(existing)
-                    else:
-                        # Create
-                        repo = Repo(**metadata.dict(exclude={"id", "created_at_db", "updated_at_db"}))
-                        db.add(repo)
-                        db.commit()
-                        db.refresh(repo)
-                        ingested.append(repo)
-                
-                print(f"Ingested: {metadata.full_name}")
-            except Exception as e:
-                print(f"Error ingesting {repo_data.get('full_name', 'unknown')}: {e}")
+        # Fetch README/languages/tree for changed candidates concurrently
+        all_metadata = self.github_client.fetch_repos_metadata(changed)
+        failed = {}
+        # Batch (GraphQL) records lack some fields; those keep their stored values
+        fetched_by_exclude: Dict[frozenset, List[Tuple[str, RepoMetadata]]] = {}
+        for repo_data, metadata in zip(changed, all_metadata):
+            if metadata is None:
+                failed[repo_data["html_url"]] = None
                 continue
+            unfetched = frozenset(self.github_client.unfetched_fields(metadata))
+            fetched_by_exclude.setdefault(unfetched, []).append((repo_data["html_url"], metadata))
+        partial_urls = [url for unfetched, pairs in fetched_by_exclude.items() if unfetched
+                        for url, _ in pairs if url not in stored]
+        if partial_urls:
+            stored.update(self._load_stored_state(partial_urls))
+        refreshed = [self._build_unchanged_metadata(r, stored[r["html_url"]]) for r in unchanged]
+        
+        # Write in chunks with one upsert statement per chunk
+        id_by_url: Dict[str, int] = {}
+        try:
+            for unfetched, pairs in fetched_by_exclude.items():
+                records = [
+                    apply_content_hashes(
+                        metadata,
+                        (stored.get(url) or {}).get("content_hashes"),
+                        fields=[field for field in HASHED_FIELDS if field not in unfetched],
+                    )
+                    for url, metadata in pairs
+                ]
+                ids = self.writer.write(records, exclude=set(unfetched))
+                id_by_url.update(zip((url for url, _ in pairs), ids))
+            ids = self.writer.write(refreshed, exclude=set(EXPENSIVE_FIELDS))
+            id_by_url.update(zip((r["html_url"] for r in unchanged), ids))
+        except Exception as e:
+            # Items stay pending, so the run is left resumable
+            print(f"Error writing {len(changed) - len(failed) + len(refreshed)} repositories: {e}")
+            return []
+        
+        self.journal.mark(run_id, "done", id_by_url)
+        self.journal.mark(run_id, "failed", failed)
+        # Report ids in candidate order, not fetched-then-refreshed order
+        return [id_by_url[r["html_url"]] for r in candidates if r["html_url"] in id_by_url]
+    
+    def ingest_trending(self, language: Optional[str] = None, limit: int = 100,
+                        incremental: Optional[bool] = None, resume: bool = True) -> List[int]:
+        """
+        Ingest trending repositories and return their ids.
+        In incremental mode, README, languages and file tree are only refetched
+        for repos whose pushed_at moved since the last ingest; the rest only
+        get their cheap search-payload columns refreshed.
+        Progress is journaled every INGESTION_CHECKPOINT_SIZE repos; with
+        `resume`, an unfinished recent run for the same language is continued
+        from its remaining candidates instead of starting over.
+        """
+        incremental = settings.ingestion_incremental if incremental is None else incremental
+        run_id = self.journal.find_resumable(language, settings.ingestion_resume_max_age_hours) if resume else None
+        if run_id:
+            candidates = self.journal.pending(run_id)
+            print(f"Resuming ingestion run {run_id}: {len(candidates)} repos left")
+        else:
+            print(f"Fetching trending repos (language={language}, limit={limit})...")
+            hits = self.github_client.get_trending_repos(language=language)
+            # Search pages can overlap; the journal holds one item per URL
+            candidates = list({repo_data["html_url"]: repo_data for repo_data in hits}.values())[:limit]
+            run_id = self.journal.start(candidates, language=language)
         
+        ingested = []
+        step = settings.ingestion_checkpoint_size
+        for start in range(0, len(candidates), step):
+            ingested.extend(self._ingest_candidates(run_id, candidates[start:start + step], incremental))
+            print(f"Checkpoint: {min(start + step, len(candidates))}/{len(candidates)} repos processed")
+        
+        if not self.journal.finish(run_id):
+            print(f"Ingestion run {run_id} left unfinished; rerun to retry its unwritten repos")
         print(f"Ingested {len(ingested)} repositories")
         return ingested
     
-    def update_repo(self, repo_id: int) -> Optional[Repo]:
+    def _with_stored_state(self, pages: Iterable[List[Dict[str, Any]]],
+                           incremental: bool) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Pair each search hit with its stored change-detection state, loaded with one query per page."""
+        for hits in pages:
+            stored = self._load_stored_state([r["html_url"] for r in hits]) if incremental else {}
+            for repo_data in hits:
+                yield repo_data, stored.get(repo_data["html_url"])
+    
+    def _enrich_hit(self, hit: Tuple[Dict[str, Any], Optional[Dict[str, Any]]],
+                    incremental: bool) -> Optional[Tuple[RepoMetadata, bool]]:
+        """Pipeline enrichment stage: returns (metadata, is_partial) for one (search hit, stored state) pair."""
+        repo_data, stored = hit
+        if incremental and not content_changed(repo_data, stored):
+            return self._build_unchanged_metadata(repo_data, stored), True
+        return apply_content_hashes(self.github_client.fetch_repo_metadata(repo_data)), False
+    
+    def _write_enriched(self, batch: List[Tuple[RepoMetadata, bool]]) -> List[int]:
+        """Pipeline write stage: upsert full and partial records of one batch."""
+        ids = self.writer.write([metadata for metadata, partial in batch if not partial])
+        ids.extend(self.writer.write(
+            [metadata for metadata, partial in batch if partial],
+            exclude=set(EXPENSIVE_FIELDS),
+        ))
+        return ids
+    
+    def stream_trending(self, language: Optional[str] = None, limit: Optional[int] = None,
+                        incremental: Optional[bool] = None, max_pages: int = 10) -> Iterator[int]:
+        """
+        Stream trending repositories from search to the database, yielding ids
+        as each batch lands. Search paging, enrichment and writes overlap, with
+        bounded queues between them; stored state for change detection is read
+        once per search page. Unlike ingest_trending, streamed runs are not
+        journaled, since the candidate list is never materialized.
+        """
+        incremental = settings.ingestion_incremental if incremental is None else incremental
+        pages = self.github_client.iter_trending_pages(language=language, max_pages=max_pages)
+        source = self._with_stored_state(pages, incremental)
+        if limit:
+            source = islice(source, limit)
+        
+        pipeline = StreamingPipeline(
+            enrich=lambda hit: self._enrich_hit(hit, incremental),
+            write=self._write_enriched,
+            enrich_workers=settings.github_max_concurrency,
+            queue_size=settings.ingestion_queue_size,
+            batch_size=settings.ingestion_checkpoint_size,
+        )
+        return pipeline.run(source)
+    
+    def update_repo(self, repo_id: int, incremental: Optional[bool] = None) -> Optional[Repo]:
         """Update an existing repository's metadata."""
+        incremental = settings.ingestion_incremental if incremental is None else incremental
         with get_db() as db:
             repo = db.query(Repo).filter(Repo.id == repo_id).first()
             if not repo:
@@ -102,13 +225,31 @@ class RepoIngester:
             
             owner, name = repo.owner, repo.name
             repo_data = self.github_client.get_repo_details(owner, name)
-            metadata = self.github_client.fetch_repo_metadata(repo_data)
+            stored = {
+                "pushed_at": repo.pushed_at,
+                "updated_at": repo.updated_at,
+                "content_hashes": repo.content_hashes or {},
+            }
+            
+            if incremental and not content_changed(repo_data, stored):
+                # Nothing pushed: keep stored README, languages and file tree
+                metadata = self._build_unchanged_metadata(repo_data, stored)
+                exclude = EXCLUDED_FIELDS | set(EXPENSIVE_FIELDS)
+            else:
+                metadata = apply_content_hashes(self.github_client.fetch_repo_metadata(repo_data))
+                exclude = EXCLUDED_FIELDS
             
             # Update fields
-            for key, value in metadata.dict(exclude={"id", "created_at_db", "updated_at_db"}).items():
+            old_state = repo_state(repo.archived, repo.languages)
+            for key, value in metadata.dict(exclude=exclude).items():
                 setattr(repo, key, value)
             repo.updated_at_db = datetime.utcnow()
+            db.flush()
+            self.writer.star_history.record(db, {repo.id: repo.stars})
+            refresh_search_vectors(db, [repo.id])
+            repo_count, language_counts = repo_deltas([(old_state, repo_state(repo.archived, repo.languages))])
+            apply_stat_deltas(db, repos=repo_count, languages=language_counts)
+            bump_generation(db)
             db.commit()
             db.refresh(repo)
             return repo
-
@@ -0,0 +1,96 @@
+"""Durable journal for resumable ingestion runs."""
+
+import sys
+import os
+import uuid
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import get_db
+from db.models import IngestionRun, IngestionRunItem
+
+
+class IngestionJournal:
+    """
+    Records each ingestion run's candidate list and per-repo completion
+    state, so a restarted run can pick up where it stopped instead of
+    re-searching and re-fetching everything.
+    """
+    
+    def start(self, candidates: List[Dict[str, Any]], language: Optional[str] = None) -> str:
+        """Journal a new run and its candidates; returns the run id."""
+        run_id = uuid.uuid4().hex
+        with get_db() as db:
+            run = IngestionRun(run_id=run_id, language=language, candidate_count=len(candidates))
+            db.add(run)
+            db.flush()
+            db.bulk_insert_mappings(IngestionRunItem, [
+                {
+                    "run_id": run.id,
+                    "position": position,
+                    "url": repo_data["html_url"],
+                    "repo_data": repo_data,
+                    "status": "pending",
+                }
+                for position, repo_data in enumerate(candidates)
+            ])
+        return run_id
+    
+    def find_resumable(self, language: Optional[str] = None, max_age_hours: int = 24) -> Optional[str]:
+        """Get the most recent unfinished run for `language` that is not too old to resume."""
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        with get_db() as db:
+            query = db.query(IngestionRun).filter(
+                IngestionRun.status == "running",
+                IngestionRun.started_at >= cutoff,
+            )
+            if language:
+                query = query.filter(IngestionRun.language == language)
+            else:
+                query = query.filter(IngestionRun.language == None)
+            run = query.order_by(IngestionRun.started_at.desc(), IngestionRun.id.desc()).first()
+            return run.run_id if run else None
+    
+    def pending(self, run_id: str) -> List[Dict[str, Any]]:
+        """Get the candidates of a run that are not done yet, in original order."""
+        with get_db() as db:
+            items = db.query(IngestionRunItem.repo_data).join(IngestionRun).filter(
+                IngestionRun.run_id == run_id,
+                IngestionRunItem.status != "done",
+            ).order_by(IngestionRunItem.position).all()
+            return [item.repo_data for item in items]
+    
+    def mark(self, run_id: str, status: str, repo_ids: Dict[str, Optional[int]]):
+        """Checkpoint the status (and resulting repo id) of a set of candidate URLs."""
+        if not repo_ids:
+            return
+        with get_db() as db:
+            items = db.query(IngestionRunItem.id, IngestionRunItem.url).join(IngestionRun).filter(
+                IngestionRun.run_id == run_id,
+                IngestionRunItem.url.in_(list(repo_ids.keys())),
+            ).all()
+            db.bulk_update_mappings(IngestionRunItem, [
+                {"id": item.id, "status": status, "repo_id": repo_ids[item.url]}
+                for item in items
+            ])
+    
+    def finish(self, run_id: str) -> bool:
+        """
+        Mark a run as completed so it is never resumed. A run with items still
+        pending (e.g. after a failed write) stays running and returns False.
+        """
+        with get_db() as db:
+            run = db.query(IngestionRun).filter(IngestionRun.run_id == run_id).first()
+            if not run:
+                return False
+            unfinished = db.query(IngestionRunItem.id).filter(
+                IngestionRunItem.run_id == run.id,
+                IngestionRunItem.status == "pending",
+            ).first()
+            if unfinished:
+                return False
+            run.status = "completed"
+            run.completed_at = datetime.utcnow()
+            return True
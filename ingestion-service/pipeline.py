@@ -0,0 +1,123 @@
+"""Streaming search -> enrichment -> write pipeline for ingestion."""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StreamingPipeline:
+    """
+    Three stages connected by bounded queues:
+    a source thread pulls search hits from a (lazy) iterable, a pool of
+    enrichment workers turns each hit into a record, and the write stage
+    batches records and hands them to `write`, yielding the ids it returns.
+    Full queues block the stage feeding them, so memory stays bounded by
+    the queue sizes no matter how many hits the source produces.
+    """
+    
+    def __init__(self, enrich: Callable[[Any], Optional[Any]], write: Callable[[List[Any]], List[int]],
+                 enrich_workers: int = 8, queue_size: int = 200, batch_size: int = 50,
+                 flush_interval: float = 2.0):
+        self.enrich = enrich
+        self.write = write
+        self.enrich_workers = max(1, enrich_workers)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+    
+    def _put(self, target: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Put with backpressure; gives up once the pipeline is stopped."""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _produce(self, source: Iterable[Any], hits: queue.Queue, stop: threading.Event):
+        """Source stage: feed search hits into the bounded hit queue."""
+        try:
+            for item in source:
+                if not self._put(hits, item, stop):
+                    return
+        except Exception as e:
+            print(f"Pipeline source failed: {e}")
+        finally:
+            for _ in range(self.enrich_workers):
+                self._put(hits, _DONE, stop)
+    
+    def _enrich_worker(self, hits: queue.Queue, enriched: queue.Queue, stop: threading.Event):
+        """Enrichment stage: fetch the expensive data for each hit."""
+        while not stop.is_set():
+            try:
+                item = hits.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                self._put(enriched, _DONE, stop)
+                return
+            try:
+                record = self.enrich(item)
+            except Exception as e:
+                print(f"Pipeline enrichment failed: {e}")
+                continue
+            if record is not None:
+                self._put(enriched, record, stop)
+    
+    def _flush(self, batch: List[Any]) -> List[int]:
+        """Write stage: persist one batch."""
+        try:
+            return self.write(batch)
+        except Exception as e:
+            print(f"Pipeline write of {len(batch)} records failed: {e}")
+            return []
+    
+    def run(self, source: Iterable[Any]) -> Iterator[int]:
+        """Run the pipeline over `source`, yielding written ids batch by batch."""
+        hits: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        enriched: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        
+        threads = [threading.Thread(target=self._produce, args=(source, hits, stop),
+                                    name="pipeline-source", daemon=True)]
+        threads.extend(
+            threading.Thread(target=self._enrich_worker, args=(hits, enriched, stop),
+                             name=f"pipeline-enrich-{i}", daemon=True)
+            for i in range(self.enrich_workers)
+        )
+        for thread in threads:
+            thread.start()
+        
+        try:
+            batch: List[Any] = []
+            finished_workers = 0
+            last_flush = time.monotonic()
+            while finished_workers < self.enrich_workers:
+                try:
+                    item = enriched.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+                
+                if item is _DONE:
+                    finished_workers += 1
+                elif item is not None:
+                    batch.append(item)
+                
+                # Flush on a full batch, or when records have waited long enough
+                due = time.monotonic() - last_flush >= self.flush_interval
+                if batch and (len(batch) >= self.batch_size or due):
+                    yield from self._flush(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+            
+            if batch:
+                yield from self._flush(batch)
+        finally:
+            # Unblock the other stages if the caller stops consuming early
+            stop.set()
@@ -0,0 +1,144 @@
+"""Multi-token rate-limit scheduler for GitHub API calls."""
+
+import sys
+import os
+import threading
+import time
+from typing import Callable, List, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+
+# Initial per-resource budgets before any response headers have been seen
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+UNAUTHENTICATED_LIMITS = {"core": 60, "search": 10, "graphql": 0}
+
+# GitHub asks clients to back off at least a minute on a secondary rate
+# limit when no Retry-After header is given.
+SECONDARY_LIMIT_BACKOFF = 60
+
+
+class TokenBucket:
+    """Rate-limit state of one token for one API resource (core, search, graphql)."""
+    
+    def __init__(self, token: Optional[str], resource: str):
+        self.token = token
+        self.resource = resource
+        limits = DEFAULT_LIMITS if token else UNAUTHENTICATED_LIMITS
+        self.limit = limits.get(resource, limits["core"])
+        self.remaining = self.limit
+        self.reset = 0.0
+        self.blocked_until = 0.0
+        self.next_allowed = 0.0
+    
+    def refresh(self, now: float):
+        """Restore the budget once its reset time has passed."""
+        if self.reset and now >= self.reset:
+            self.remaining = self.limit
+            self.reset = 0.0
+
+
+class RateLimitScheduler:
+    """
+    Routes GitHub requests across a pool of tokens.
+    Each token keeps its own remaining/reset state per resource, read from
+    response headers. A request goes to the ready token with the most
+    headroom. Once a token's budget falls below pacing_fraction of its limit,
+    its remaining calls are spread evenly over the time to reset, so the pool
+    never stalls for a whole reset window. Retry-After and secondary rate
+    limits block a token until it may be used again.
+    """
+    
+    def __init__(self, tokens: List[Optional[str]], min_remaining: int = 10,
+                 pacing_fraction: float = 0.2, clock: Callable[[], float] = time.time):
+        self.tokens = tokens or [None]
+        self.min_remaining = min_remaining
+        self.pacing_fraction = pacing_fraction
+        self.clock = clock
+        self._buckets: Dict[str, List[TokenBucket]] = {}
+        self._condition = threading.Condition()
+    
+    def _pool(self, resource: str) -> List[TokenBucket]:
+        """Get (creating on first use) the buckets for a resource."""
+        if resource not in self._buckets:
+            self._buckets[resource] = [TokenBucket(token, resource) for token in self.tokens]
+        return self._buckets[resource]
+    
+    def _exhausted(self, bucket: TokenBucket) -> bool:
+        """Whether a bucket is down to its reserve of calls."""
+        return bucket.remaining <= min(self.min_remaining, max(bucket.limit // 10, 1))
+    
+    def _usable(self, bucket: TokenBucket, now: float) -> bool:
+        """Whether a bucket is neither blocked nor exhausted."""
+        bucket.refresh(now)
+        return bucket.blocked_until <= now and not self._exhausted(bucket)
+    
+    def _ready_at(self, bucket: TokenBucket, now: float) -> float:
+        """Earliest time a bucket can take a call: after its block, its pacing and (if exhausted) its reset."""
+        ready_at = max(bucket.blocked_until, bucket.next_allowed)
+        if self._exhausted(bucket):
+            ready_at = max(ready_at, bucket.reset or now + 1)
+        return ready_at
+    
+    def _pace_interval(self, bucket: TokenBucket, now: float) -> float:
+        """Minimum spacing between calls on a bucket that is running low."""
+        if not bucket.reset or bucket.remaining > bucket.limit * self.pacing_fraction:
+            return 0.0
+        return max(bucket.reset - now, 0.0) / max(bucket.remaining, 1)
+    
+    def acquire(self, resource: str = "core") -> TokenBucket:
+        """Block until a token can be used for `resource` and reserve one call on it."""
+        with self._condition:
+            announced = False
+            while True:
+                now = self.clock()
+                pool = self._pool(resource)
+                usable = [bucket for bucket in pool if self._usable(bucket, now)]
+                ready = [bucket for bucket in usable if bucket.next_allowed <= now]
+                if ready:
+                    bucket = max(ready, key=lambda b: b.remaining / max(b.limit, 1))
+                    bucket.remaining -= 1
+                    bucket.next_allowed = now + self._pace_interval(bucket, now)
+                    return bucket
+                
+                # A blocked token may come back before a paced one is due
+                wake_at = min(self._ready_at(bucket, now) for bucket in pool)
+                wait_time = max(wake_at - now, 0.01)
+                if wait_time > 5 and not announced:
+                    print(f"All {resource} tokens rate limited. Waiting {wait_time:.0f} seconds...")
+                    announced = True
+                self._condition.wait(timeout=wait_time)
+    
+    def update(self, bucket: TokenBucket, response: requests.Response) -> bool:
+        """
+        Record a response's rate-limit headers on its token.
+        Returns True when the request was rejected by a rate limit and should
+        be retried (on whichever token the scheduler picks next).
+        """
+        now = self.clock()
+        headers = response.headers
+        with self._condition:
+            if "X-RateLimit-Limit" in headers:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                bucket.reset = float(headers["X-RateLimit-Reset"])
+            
+            limited = False
+            if response.status_code in (403, 429):
+                retry_after = headers.get("Retry-After")
+                if retry_after is not None:
+                    bucket.blocked_until = now + float(retry_after)
+                    limited = True
+                elif bucket.remaining == 0 and bucket.reset:
+                    bucket.blocked_until = bucket.reset
+                    limited = True
+                elif "secondary rate limit" in response.text.lower():
+                    bucket.blocked_until = now + SECONDARY_LIMIT_BACKOFF
+                    limited = True
+            
+            self._condition.notify_all()
+            return limited
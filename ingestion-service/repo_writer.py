@@ -0,0 +1,181 @@
+"""Batched repository writer using dialect-native upserts."""
+
+import sys
+import os
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.sql import func
+
+from db.connection import get_db
+from db.generation import bump_generation
+from db.search import refresh_search_vectors
+from db.stats import apply_stat_deltas, repo_deltas, repo_state, primary_language
+from db.models import Repo
+from shared.compression import compress_text, text_preview
+from shared.config import settings
+from shared.schemas import RepoMetadata
+from ingestion_service.star_history import StarHistory
+
+
+# Columns managed by the database rather than by ingestion, plus the views
+# derived on write (README preview) or on read (nested file tree)
+EXCLUDED_FIELDS = {"id", "created_at_db", "updated_at_db", "file_tree", "readme_preview"}
+
+
+class RepoWriter:
+    """
+    Collects RepoMetadata records and writes them in chunks with a single
+    INSERT ... ON CONFLICT (url) DO UPDATE per chunk.
+    PostgreSQL and SQLite use the native upsert; other dialects fall back
+    to a per-row merge inside one transaction.
+    Every chunk also appends star snapshots and refreshes windowed velocities
+    in the same transaction; /stats counters and the data generation are
+    updated once per write().
+    """
+    
+    def __init__(self, chunk_size: int = None, star_history: Optional[StarHistory] = None):
+        self.chunk_size = chunk_size or settings.ingestion_write_chunk_size
+        self.star_history = star_history or StarHistory()
+        self._pending: List[RepoMetadata] = []
+    
+    def add(self, metadata: RepoMetadata) -> List[int]:
+        """Queue a record; returns the ids written if this filled a chunk."""
+        self._pending.append(metadata)
+        if len(self._pending) >= self.chunk_size:
+            return self.flush()
+        return []
+    
+    def flush(self) -> List[int]:
+        """Write all queued records and return their ids in queue order."""
+        pending, self._pending = self._pending, []
+        return self.write(pending)
+    
+    def write(self, records: Iterable[RepoMetadata], exclude: Optional[Set[str]] = None) -> List[int]:
+        """
+        Upsert records in chunks and return their ids in input order.
+        Fields in `exclude` are neither inserted nor overwritten, which lets
+        incremental runs refresh cheap columns without touching stored content.
+        Repeated URLs are written once (the last record wins), so each repo
+        gets one star snapshot and one stats delta per call.
+        """
+        records = list(records)
+        unique = list({str(metadata.url): metadata for metadata in records}.values())
+        id_by_url: Dict[str, int] = {}
+        repo_count, language_counts = 0, Counter()
+        try:
+            for start in range(0, len(unique), self.chunk_size):
+                chunk = unique[start:start + self.chunk_size]
+                ids, chunk_repos, chunk_languages = self._write_chunk(chunk, exclude or set())
+                id_by_url.update(zip((str(metadata.url) for metadata in chunk), ids))
+                repo_count += chunk_repos
+                language_counts.update(chunk_languages)
+        finally:
+            # Counters and generation for the committed chunks, in a short
+            # transaction of their own: both are single rows, and holding them
+            # in every chunk transaction would serialize concurrent writers.
+            # Bumping after the data commits also means no cache entry built
+            # under the new generation can miss the new rows.
+            if id_by_url:
+                with get_db() as db:
+                    apply_stat_deltas(db, repos=repo_count, languages=language_counts)
+                    bump_generation(db)
+        return [id_by_url[str(metadata.url)] for metadata in records]
+    
+    def _to_row(self, metadata: RepoMetadata, exclude: Set[str]) -> Dict[str, Any]:
+        """Convert RepoMetadata to a column dict for the repos table."""
+        row = metadata.dict(exclude=EXCLUDED_FIELDS | exclude)
+        row["url"] = str(metadata.url)
+        if "readme" in row:
+            readme = row.pop("readme")
+            row["readme_compressed"] = compress_text(readme)
+            row["readme_preview"] = text_preview(readme)
+        return row
+    
+    def _write_chunk(self, records: List[RepoMetadata], exclude: Set[str]) -> Tuple[List[int], int, Counter]:
+        """Upsert one chunk with a single statement; returns ids and the chunk's stats deltas."""
+        if not records:
+            return [], 0, Counter()
+        
+        # A single upsert may not touch the same row twice, so keep the
+        # last record per URL and map ids back to input order afterwards.
+        rows_by_url = {}
+        for metadata in records:
+            row = self._to_row(metadata, exclude)
+            rows_by_url[row["url"]] = row
+        rows = list(rows_by_url.values())
+        
+        with get_db() as db:
+            old_states = {
+                url: repo_state(archived, languages)
+                for url, archived, languages in db.query(Repo.url, Repo.archived, Repo.languages).filter(
+                    Repo.url.in_(list(rows_by_url))
+                )
+            }
+            
+            dialect = db.get_bind().dialect.name
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+                id_by_url = self._upsert_chunk(db, insert, rows)
+            elif dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+                id_by_url = self._upsert_chunk(db, insert, rows)
+            else:
+                id_by_url = self._merge_chunk(db, rows)
+            
+            self.star_history.record(db, {
+                id_by_url[row["url"]]: row["stars"] for row in rows if "stars" in row
+            })
+            refresh_search_vectors(db, id_by_url.values())
+            repo_count, language_counts = repo_deltas(
+                (old_states.get(row["url"]), self._new_state(row, old_states.get(row["url"]))) for row in rows
+            )
+        
+        return [id_by_url[str(metadata.url)] for metadata in records], repo_count, language_counts
+    
+    def _new_state(self, row: Dict[str, Any], old_state):
+        """Stats state after the upsert; excluded columns keep their stored values."""
+        archived = row["archived"] if "archived" in row else (old_state[0] if old_state else False)
+        if "languages" in row:
+            language = primary_language(row["languages"])
+        else:
+            language = old_state[1] if old_state else None
+        return (bool(archived), language)
+    
+    def _upsert_chunk(self, db, insert, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Native INSERT ... ON CONFLICT (url) DO UPDATE ... RETURNING for one chunk."""
+        stmt = insert(Repo.__table__).values(rows)
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in rows[0].keys()
+            if column != "url"
+        }
+        update_columns["updated_at_db"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url"],
+            set_=update_columns,
+        ).returning(Repo.__table__.c.id, Repo.__table__.c.url)
+        
+        return {url: repo_id for repo_id, url in db.execute(stmt)}
+    
+    def _merge_chunk(self, db, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Fallback upsert for dialects without ON CONFLICT support."""
+        existing = {
+            repo.url: repo
+            for repo in db.query(Repo).filter(Repo.url.in_([row["url"] for row in rows])).all()
+        }
+        for row in rows:
+            repo = existing.get(row["url"])
+            if repo:
+                for key, value in row.items():
+                    setattr(repo, key, value)
+                repo.updated_at_db = datetime.utcnow()
+            else:
+                repo = Repo(**row)
+                db.add(repo)
+                existing[row["url"]] = repo
+        db.flush()
+        return {url: repo.id for url, repo in existing.items()}
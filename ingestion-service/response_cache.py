@@ -0,0 +1,52 @@
+"""Persistent response cache for conditional GitHub API requests."""
+
+import sys
+import os
+from typing import Dict, Any, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import get_db
+from db.models import GitHubResponseCache
+
+
+class ResponseCache:
+    """
+    Stores ETag / Last-Modified validators and bodies per request URL.
+    The cache is best effort: storage errors never fail the underlying request.
+    """
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the cached validators and body for a URL."""
+        try:
+            with get_db() as db:
+                entry = db.query(GitHubResponseCache).filter(GitHubResponseCache.url == url).first()
+                if not entry:
+                    return None
+                return {
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "body": entry.body,
+                }
+        except Exception as e:
+            print(f"Response cache read failed for {url}: {e}")
+            return None
+    
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: Any):
+        """Store the validators and body for a URL."""
+        try:
+            with get_db() as db:
+                entry = db.query(GitHubResponseCache).filter(GitHubResponseCache.url == url).first()
+                if entry:
+                    entry.etag = etag
+                    entry.last_modified = last_modified
+                    entry.body = body
+                else:
+                    db.add(GitHubResponseCache(
+                        url=url,
+                        etag=etag,
+                        last_modified=last_modified,
+                        body=body,
+                    ))
+        except Exception as e:
+            print(f"Response cache write failed for {url}: {e}")
@@ -0,0 +1,104 @@
+"""Star-count time series and windowed star velocity."""
+
+import sys
+import os
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from db.models import Repo, RepoStarSnapshot
+from shared.config import settings
+
+
+# Velocity windows, keyed by the Repo column they are stored in
+WINDOWS = {
+    "star_velocity_1d": timedelta(days=1),
+    "star_velocity_7d": timedelta(days=7),
+    "star_velocity_30d": timedelta(days=30),
+}
+
+# Shorter histories are too noisy to extrapolate a velocity from
+MIN_HISTORY = timedelta(hours=1)
+
+# Baselines are searched back to the longest window plus this much, which
+# covers a missed or late ingest run around the window edge
+BASELINE_SLACK = timedelta(days=1)
+
+
+class StarHistory:
+    """
+    Appends a star snapshot per repo on every ingest and keeps the windowed
+    velocity columns on Repo up to date. Each update looks up one baseline
+    snapshot per repo and window through the (repo_id, captured_at) index,
+    scanning only the last 30 days plus BASELINE_SLACK of history, so the
+    cost depends on the batch size, not on how much history exists.
+    """
+    
+    def _baselines(self, db: Session, repo_ids: List[int], floor: datetime, cutoff: Optional[datetime],
+                   latest: bool) -> Dict[int, Tuple[datetime, int]]:
+        """
+        Per repo, among snapshots at or after `floor`: the latest one at or
+        before `cutoff` (latest=True) or the earliest one (latest=False).
+        """
+        picked = func.max(RepoStarSnapshot.captured_at) if latest else func.min(RepoStarSnapshot.captured_at)
+        subquery = db.query(
+            RepoStarSnapshot.repo_id, picked.label("captured_at")
+        ).filter(RepoStarSnapshot.repo_id.in_(repo_ids), RepoStarSnapshot.captured_at >= floor)
+        if cutoff is not None:
+            subquery = subquery.filter(RepoStarSnapshot.captured_at <= cutoff)
+        subquery = subquery.group_by(RepoStarSnapshot.repo_id).subquery()
+        
+        rows = db.query(
+            RepoStarSnapshot.repo_id, RepoStarSnapshot.captured_at, RepoStarSnapshot.stars
+        ).join(subquery, and_(
+            RepoStarSnapshot.repo_id == subquery.c.repo_id,
+            RepoStarSnapshot.captured_at == subquery.c.captured_at,
+        )).all()
+        return {row.repo_id: (row.captured_at, row.stars) for row in rows}
+    
+    def record(self, db: Session, stars_by_repo: Dict[int, int],
+               captured_at: Optional[datetime] = None) -> Dict[int, Dict[str, Optional[float]]]:
+        """
+        Append snapshots for `stars_by_repo` and update the windowed velocity
+        columns of those repos in the caller's session. Returns the velocities.
+        """
+        if not stars_by_repo:
+            return {}
+        now = captured_at or datetime.utcnow()
+        repo_ids = list(stars_by_repo.keys())
+        
+        # Baselines are read before appending, so the new sample is never its own baseline
+        floor = now - max(WINDOWS.values()) - BASELINE_SLACK
+        earliest = self._baselines(db, repo_ids, floor, None, latest=False)
+        velocities: Dict[int, Dict[str, Optional[float]]] = {repo_id: {} for repo_id in repo_ids}
+        for column, window in WINDOWS.items():
+            baselines = self._baselines(db, repo_ids, floor, now - window, latest=True)
+            for repo_id, stars in stars_by_repo.items():
+                # Windows without an old enough sample in range fall back to the oldest one
+                baseline = baselines.get(repo_id) or earliest.get(repo_id)
+                if not baseline or now - baseline[0] < MIN_HISTORY:
+                    velocities[repo_id][column] = None
+                    continue
+                elapsed_days = (now - baseline[0]).total_seconds() / 86400
+                velocities[repo_id][column] = (stars - baseline[1]) / elapsed_days
+        
+        db.bulk_insert_mappings(RepoStarSnapshot, [
+            {"repo_id": repo_id, "captured_at": now, "stars": stars}
+            for repo_id, stars in stars_by_repo.items()
+        ])
+        db.bulk_update_mappings(Repo, [
+            dict(values, id=repo_id) for repo_id, values in velocities.items()
+        ])
+        return velocities
+    
+    def prune(self, db: Session, retention_days: Optional[int] = None) -> int:
+        """Delete snapshots older than the longest window needs; returns rows removed."""
+        retention_days = retention_days or settings.star_snapshot_retention_days
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        return db.query(RepoStarSnapshot).filter(
+            RepoStarSnapshot.captured_at < cutoff
+        ).delete(synchronize_session=False)
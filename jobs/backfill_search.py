@@ -0,0 +1,47 @@
+"""Job to (re)build Repo.search_vector for every repository."""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import get_db, init_db
+from db.generation import bump_generation
+from db.models import Repo
+from db.search import refresh_search_vectors, uses_tsvector
+
+
+def main(batch_size: int = 1000) -> int:
+    """
+    Refresh search vectors over all repos in id order, one transaction per
+    batch. Needed once after the search_vector column is added to an
+    existing database, since writers only refresh the repos they touch.
+    """
+    print("Initializing database...")
+    init_db()
+    
+    with get_db() as db:
+        if not uses_tsvector(db):
+            print("Database has no tsvector support; search uses the in-process index")
+            return 0
+    
+    refreshed, last_id = 0, 0
+    while True:
+        with get_db() as db:
+            ids = [row.id for row in db.query(Repo.id).filter(Repo.id > last_id).order_by(Repo.id).limit(batch_size)]
+            if not ids:
+                break
+            refresh_search_vectors(db, ids)
+        refreshed += len(ids)
+        last_id = ids[-1]
+        print(f"Refreshed search vectors for {refreshed} repos")
+    
+    if refreshed:
+        with get_db() as db:
+            bump_generation(db)
+    print(f"Search vector backfill complete: {refreshed} repos")
+    return refreshed
+
+
+if __name__ == "__main__":
+    main()
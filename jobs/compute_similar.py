@@ -0,0 +1,29 @@
+"""Job to precompute "similar repositories" neighbor lists from stored embeddings."""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db
+from embedding_service.vector_db import QdrantClient
+from curation_engine.similarity import SimilarRepoBuilder
+
+
+def main(full: bool = False):
+    """Refresh neighbor lists; only repos with changed embeddings unless full is set."""
+    print("Initializing services...")
+    init_db()
+    
+    builder = SimilarRepoBuilder(QdrantClient())
+    
+    if full:
+        print("Rebuilding similar repos for all repositories...")
+        return builder.rebuild_all()
+    
+    print("Refreshing similar repos for changed embeddings...")
+    return builder.refresh_stale()
+
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv[1:])
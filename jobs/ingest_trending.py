@@ -5,8 +5,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connection import init_db
+from db.connection import get_db, init_db
 from ingestion_service.ingester import RepoIngester
+from ingestion_service.star_history import StarHistory
 from shared.config import settings
 
 
@@ -19,10 +20,18 @@ def main():
     ingester = RepoIngester()
     
     # Ingest trending repos
-    repos = ingester.ingest_trending(limit=settings.ingestion_batch_size)
+    if settings.ingestion_streaming:
+        repo_ids = list(ingester.stream_trending(limit=settings.ingestion_batch_size))
+    else:
+        repo_ids = ingester.ingest_trending(limit=settings.ingestion_batch_size)
     
-    print(f"Ingested {len(repos)} repositories")
-    return repos
+    print(f"Ingested {len(repo_ids)} repositories")
+    
+    # Drop star snapshots older than the longest velocity window needs
+    with get_db() as db:
+        pruned = StarHistory().prune(db)
+    print(f"Pruned {pruned} old star snapshots")
+    return repo_ids
 
 
 if __name__ == "__main__":
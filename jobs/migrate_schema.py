@@ -0,0 +1,131 @@
+"""Job to bring an existing database up to the current models and convert legacy columns."""
+
+import sys
+import os
+import json
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+
+from db.connection import engine as default_engine
+from db.models import Base, Repo
+from shared.compression import compress_text, text_preview
+from shared.file_tree import encode_file_tree, file_tree_features, file_tree_from_nested
+
+# Typed per-row update (bound values go through the column types, e.g. JSON)
+_UPDATE_REPO = Repo.__table__.update().where(Repo.__table__.c.id == bindparam("repo_id"))
+
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """
+    Add model columns that existing tables lack (create_all only creates
+    whole tables). Returns the "table.column" names added.
+    """
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                print(f"Skipping {table.name}.{column.name}: NOT NULL without a server default needs a manual migration")
+                continue
+            quote = engine.dialect.identifier_preparer.quote
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(engine: Engine):
+    """Create model indexes that do not exist yet."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def convert_file_trees(engine: Engine, batch_size: int = 500) -> int:
+    """
+    Encode the legacy nested repos.file_tree JSON into file_tree_compact and
+    file_tree_features. The old column is left in place; drop it once the
+    conversion has been checked.
+    """
+    if "file_tree" not in {column["name"] for column in inspect(engine).get_columns("repos")}:
+        return 0
+    converted, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, file_tree FROM repos WHERE id > :last_id AND file_tree IS NOT NULL "
+                "AND file_tree_compact IS NULL ORDER BY id LIMIT :limit"
+            ), {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                return converted
+            updates = []
+            for repo_id, nested in rows:
+                tree = file_tree_from_nested(json.loads(nested) if isinstance(nested, str) else nested)
+                updates.append({
+                    "repo_id": repo_id,
+                    "compact": encode_file_tree(tree) if tree else None,
+                    "features": file_tree_features(tree) if tree else None,
+                })
+            conn.execute(_UPDATE_REPO.values(
+                file_tree_compact=bindparam("compact"), file_tree_features=bindparam("features"),
+            ), updates)
+        converted += len(rows)
+        last_id = rows[-1][0]
+        print(f"Converted {converted} file trees")
+
+
+def convert_readmes(engine: Engine, batch_size: int = 200) -> int:
+    """
+    Compress the legacy plain-text repos.readme into readme_compressed and
+    fill readme_preview. The old column is left in place, as with file_tree.
+    """
+    if "readme" not in {column["name"] for column in inspect(engine).get_columns("repos")}:
+        return 0
+    converted, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, readme FROM repos WHERE id > :last_id AND readme IS NOT NULL "
+                "AND readme_compressed IS NULL ORDER BY id LIMIT :limit"
+            ), {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                return converted
+            conn.execute(_UPDATE_REPO.values(
+                readme_compressed=bindparam("compressed"), readme_preview=bindparam("preview"),
+            ), [
+                {"repo_id": repo_id, "compressed": compress_text(readme), "preview": text_preview(readme)}
+                for repo_id, readme in rows
+            ])
+        converted += len(rows)
+        last_id = rows[-1][0]
+        print(f"Converted {converted} READMEs")
+
+
+def main(engine: Optional[Engine] = None):
+    """Create missing tables, columns and indexes, then convert legacy data."""
+    engine = engine or default_engine
+    print("Creating missing tables...")
+    Base.metadata.create_all(bind=engine)
+    
+    added = add_missing_columns(engine)
+    print(f"Added columns: {', '.join(added)}" if added else "No columns missing")
+    create_missing_indexes(engine)
+    
+    trees = convert_file_trees(engine)
+    readmes = convert_readmes(engine)
+    print(f"Schema migration complete ({trees} file trees, {readmes} READMEs converted)")
+    return {"columns": added, "file_trees": trees, "readmes": readmes}
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import sys
 import os
+from datetime import datetime
 from typing import List
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,6 +12,8 @@ from db.models import Repo, RepoSummary
 from llm_service.summarizer import RepoSummarizer
 from embedding_service.embedder import EmbeddingService
 from embedding_service.vector_db import QdrantClient
+from curation_engine.similarity import SimilarRepoBuilder
+from ingestion_service.change_detection import needs_summary_filter
 from shared.config import settings
 
 
@@ -24,15 +27,16 @@ def process_repos(batch_size: int = 50):
     vector_db = QdrantClient()
     
     with get_db() as db:
-        # Get repos without summaries
-        repos_without_summaries = db.query(Repo).outerjoin(RepoSummary).filter(
-            RepoSummary.id == None,
+        # Get repos without summaries, or whose content changed since they were summarized
+        repos_to_process = db.query(Repo).outerjoin(RepoSummary).filter(
+            needs_summary_filter(),
             Repo.archived == False
         ).limit(batch_size).all()
         
-        print(f"Found {len(repos_without_summaries)} repos to process")
+        print(f"Found {len(repos_to_process)} repos to process")
+        embedded_ids = []
         
-        for repo in repos_without_summaries:
+        for repo in repos_to_process:
             try:
                 print(f"Processing repo {repo.id}: {repo.full_name}")
                 
@@ -49,12 +53,18 @@ def process_repos(batch_size: int = 50):
                 
                 # Store in vector DB
                 embedder.store_embedding(repo.id, embedding, vector_db)
+                repo.embedding_updated_at = datetime.utcnow()
+                embedded_ids.append(repo.id)
                 print(f"  Stored embedding")
                 
             except Exception as e:
                 print(f"  Error processing repo {repo.id}: {e}")
                 continue
     
+    # Refresh "similar repos" for the changed embeddings (and the lists they now belong in)
+    if embedded_ids:
+        SimilarRepoBuilder(vector_db).refresh(embedded_ids)
+    
     print("Processing complete")
 
 
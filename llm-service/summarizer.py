@@ -2,12 +2,16 @@
 
 import sys
 import os
+from collections import Counter
 from typing import Optional
 from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.connection import get_db
+from db.generation import bump_generation
+from db.search import refresh_search_vectors
+from db.stats import apply_stat_deltas
 from db.models import Repo, RepoSummary
 from llm_service.llm_client import LLMClient
 from shared.schemas import SkillLevel, ProjectHealth
@@ -34,7 +38,7 @@ class RepoSummarizer:
                 "languages": repo.languages or {},
                 "topics": repo.topics or [],
                 "stars": repo.stars,
-                "readme": repo.readme or "",
+                "readme": repo.readme_preview or "",  # The prompt only uses the first 2000 chars
             }
             
             # Generate summary using LLM
@@ -45,6 +49,7 @@ class RepoSummarizer:
             
             if existing:
                 # Update existing summary
+                old_category = existing.category
                 existing.summary = llm_result["summary"]
                 existing.tags = llm_result["tags"]
                 existing.category = llm_result["category"]
@@ -53,7 +58,14 @@ class RepoSummarizer:
                 existing.project_health = llm_result["project_health"]
                 existing.project_health_score = llm_result["project_health_score"]
                 existing.use_cases = llm_result.get("use_cases", [])
+                existing.source_hash = repo.content_hash
                 existing.updated_at = datetime.utcnow()
+                refresh_search_vectors(db, [repo_id])
+                category_counts = Counter()
+                category_counts[old_category] -= 1
+                category_counts[existing.category] += 1
+                apply_stat_deltas(db, categories=category_counts)
+                bump_generation(db)
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -69,8 +81,12 @@ class RepoSummarizer:
                     project_health=llm_result["project_health"],
                     project_health_score=llm_result["project_health_score"],
                     use_cases=llm_result.get("use_cases", []),
+                    source_hash=repo.content_hash,
                 )
                 db.add(summary)
+                refresh_search_vectors(db, [repo_id])
+                apply_stat_deltas(db, categories=Counter({summary.category: 1}))
+                bump_generation(db)
                 db.commit()
                 db.refresh(summary)
                 return summary
@@ -0,0 +1,29 @@
+"""Compression helpers for wide text columns."""
+
+import zlib
+from typing import Optional
+
+
+# Summaries and embeddings only ever look at the start of a README
+README_PREVIEW_LENGTH = 2000
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Compress text with zlib; None stays None."""
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    """Inverse of compress_text."""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def text_preview(text: Optional[str], length: int = README_PREVIEW_LENGTH) -> Optional[str]:
+    """First `length` characters of text, for places that never need the rest."""
+    if text is None:
+        return None
+    return text[:length]
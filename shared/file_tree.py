@@ -0,0 +1,153 @@
+"""Compact encoding and derived features for repository file trees."""
+
+import json
+import zlib
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+
+ENCODING_VERSION = 1
+
+# Single-character codes for git tree entry types
+TYPE_CODES = {"blob": "b", "tree": "t", "commit": "c"}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+TEST_DIRS = {"test", "tests", "__tests__", "spec", "specs", "testing"}
+DOC_DIRS = {"doc", "docs", "documentation", "wiki"}
+CI_PATHS = (
+    ".github/workflows/", ".circleci/", ".gitlab-ci.yml", ".travis.yml",
+    "Jenkinsfile", "azure-pipelines.yml", ".buildkite/", "bitbucket-pipelines.yml",
+)
+
+MAX_EXTENSIONS = 20
+
+
+def encode_file_tree(tree: List[Dict[str, Any]], compress: bool = True) -> bytes:
+    """
+    Encode a GitHub recursive tree listing compactly.
+    Path segments are interned into one table and each entry stores its
+    segment indexes, a one-letter type code and its size in parallel arrays.
+    """
+    segment_index: Dict[str, int] = {}
+    segments: List[str] = []
+    paths: List[List[int]] = []
+    types: List[str] = []
+    sizes: List[int] = []
+    
+    for item in tree:
+        indexes = []
+        for part in item["path"].split("/"):
+            if part not in segment_index:
+                segment_index[part] = len(segments)
+                segments.append(part)
+            indexes.append(segment_index[part])
+        paths.append(indexes)
+        types.append(TYPE_CODES.get(item.get("type"), "b"))
+        sizes.append(item.get("size", 0) or 0)
+    
+    payload = json.dumps({
+        "v": ENCODING_VERSION,
+        "segments": segments,
+        "paths": paths,
+        "types": "".join(types),
+        "sizes": sizes,
+    }, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(payload, 9) if compress else payload
+
+
+def decode_file_tree(data: Optional[bytes]) -> List[Tuple[str, str, int]]:
+    """Decode an encoded tree into (path, type, size) entries."""
+    if not data:
+        return []
+    if not data.startswith(b"{"):
+        data = zlib.decompress(data)
+    payload = json.loads(data)
+    segments = payload["segments"]
+    return [
+        ("/".join(segments[i] for i in indexes), TYPE_NAMES.get(code, "blob"), size)
+        for indexes, code, size in zip(payload["paths"], payload["types"], payload["sizes"])
+    ]
+
+
+def file_tree_to_nested(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """Expand an encoded tree into the nested dict format served by the API."""
+    if not data:
+        return None
+    result = {}
+    for path, item_type, size in decode_file_tree(data):
+        path_parts = path.split("/")
+        current = result
+        for part in path_parts[:-1]:
+            if part not in current:
+                current[part] = {}
+            current = current[part]
+        if item_type == "tree" and isinstance(current.get(path_parts[-1]), dict):
+            continue  # Directory already populated by its children
+        current[path_parts[-1]] = {
+            "type": item_type,
+            "size": size,
+        }
+    return result
+
+
+def file_tree_from_nested(nested: Optional[Dict[str, Any]], prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Flatten the legacy nested dict format back into a tree listing.
+    Directory entries keep their own "type"/"size" keys next to their
+    children, so only dict values are treated as child paths.
+    """
+    tree = []
+    for name, node in (nested or {}).items():
+        if not isinstance(node, dict):
+            continue
+        path = prefix + name
+        item_type = node.get("type") if isinstance(node.get("type"), str) else "tree"
+        size = node.get("size") if isinstance(node.get("size"), int) else 0
+        tree.append({"path": path, "type": item_type, "size": size})
+        tree.extend(file_tree_from_nested(node, path + "/"))
+    return tree
+
+
+def file_tree_features(tree: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute summary features of a GitHub tree listing."""
+    file_count = 0
+    dir_count = 0
+    total_size = 0
+    max_depth = 0
+    extensions: Counter = Counter()
+    has_tests = has_docs = has_ci = False
+    
+    for item in tree:
+        path = item["path"]
+        parts = path.split("/")
+        max_depth = max(max_depth, len(parts))
+        lower_parts = [part.lower() for part in parts]
+        
+        if item.get("type") == "tree":
+            dir_count += 1
+        else:
+            file_count += 1
+            total_size += item.get("size", 0) or 0
+            filename = lower_parts[-1]
+            if "." in filename.lstrip("."):
+                extensions["." + filename.rsplit(".", 1)[-1]] += 1
+            if filename.startswith("test_") or filename.rsplit(".", 1)[0].endswith(("_test", ".test", ".spec")):
+                has_tests = True
+        
+        if TEST_DIRS.intersection(lower_parts[:-1] if item.get("type") != "tree" else lower_parts):
+            has_tests = True
+        if DOC_DIRS.intersection(lower_parts):
+            has_docs = True
+        if any(path.startswith(ci_path) or path == ci_path.rstrip("/") for ci_path in CI_PATHS):
+            has_ci = True
+    
+    return {
+        "file_count": file_count,
+        "dir_count": dir_count,
+        "total_size": total_size,
+        "max_depth": max_depth,
+        "extensions": dict(extensions.most_common(MAX_EXTENSIONS)),
+        "has_tests": has_tests,
+        "has_docs": has_docs,
+        "has_ci": has_ci,
+    }
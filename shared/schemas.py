@@ -32,6 +32,7 @@ class RepoMetadata(BaseModel):
     owner: str
     description: Optional[str] = None
     readme: Optional[str] = None
+    readme_preview: Optional[str] = None  # First characters of the README, for list views
     languages: Dict[str, float] = Field(default_factory=dict)
     stars: int = 0
     forks: int = 0
@@ -44,10 +45,14 @@ class RepoMetadata(BaseModel):
     topics: List[str] = Field(default_factory=list)
     license: Optional[str] = None
     archived: bool = False
-    file_tree: Optional[Dict[str, Any]] = None
+    file_tree: Optional[Dict[str, Any]] = None  # Nested view, decoded on demand
+    file_tree_compact: Optional[bytes] = None  # Stored encoding, see shared.file_tree
+    file_tree_features: Optional[Dict[str, Any]] = None
     commit_count: int = 0
     contributor_count: int = 0
     star_velocity: float = 0.0  # Stars gained per day
+    content_hashes: Dict[str, str] = Field(default_factory=dict)
+    content_hash: Optional[str] = None
     created_at_db: Optional[datetime] = None
     updated_at_db: Optional[datetime] = None
 
@@ -121,12 +126,72 @@ class RepoWithSummary(BaseModel):
     embedding_id: Optional[str] = None
 
 
+class RepoCard(BaseModel):
+    """
+    Slim repository view for list endpoints (view=card or fields=...).
+    Only the requested fields are present in responses.
+    """
+    id: Optional[int] = None
+    url: Optional[HttpUrl] = None
+    full_name: Optional[str] = None
+    name: Optional[str] = None
+    owner: Optional[str] = None
+    description: Optional[str] = None
+    readme_preview: Optional[str] = None
+    languages: Optional[Dict[str, float]] = None
+    stars: Optional[int] = None
+    forks: Optional[int] = None
+    watchers: Optional[int] = None
+    open_issues: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    pushed_at: Optional[datetime] = None
+    default_branch: Optional[str] = None
+    topics: Optional[List[str]] = None
+    license: Optional[str] = None
+    archived: Optional[bool] = None
+    file_tree_features: Optional[Dict[str, Any]] = None
+    commit_count: Optional[int] = None
+    contributor_count: Optional[int] = None
+    star_velocity: Optional[float] = None
+
+
+class RepoSummaryCard(BaseModel):
+    """Summary fields shown on repository cards."""
+    summary: str
+    tags: List[str] = Field(default_factory=list)
+    category: str
+    skill_level: SkillLevel
+
+
+class RepoCardWithSummary(BaseModel):
+    """Slim counterpart of RepoWithSummary."""
+    repo: RepoCard
+    summary: Optional[RepoSummaryCard] = None
+
+
+class SemanticSearchResult(RepoWithSummary):
+    """Repository matched by vector similarity to a query."""
+    score: float
+
+
+class SimilarRepo(RepoWithSummary):
+    """Precomputed nearest neighbor of a repository."""
+    score: float
+
+
 class BoardWithRepos(BaseModel):
     """Board with its repositories."""
     board: Board
     repos: List[RepoWithSummary] = Field(default_factory=list)
 
 
+class BoardWithRepoCards(BaseModel):
+    """Board with slim repository cards."""
+    board: Board
+    repos: List[RepoCardWithSummary] = Field(default_factory=list)
+
+
 class CurationScore(BaseModel):
     """Scoring breakdown for repository curation."""
     repo_id: int
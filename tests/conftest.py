@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+# Settings and the API's engine are bound at import time, so point every test at a scratch SQLite file first
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/repoboard_test.db")
+
+# Services live in hyphenated directories but import each other as ingestion_service etc.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+for directory in ("ingestion-service", "embedding-service", "curation-engine", "llm-service"):
+    name = directory.replace("-", "_")
+    path = os.path.join(ROOT, directory)
+    if name not in sys.modules and os.path.exists(os.path.join(path, "__init__.py")):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
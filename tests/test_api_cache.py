@@ -0,0 +1,119 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from api.cache import LRUBackend, ResponseCache  # noqa: E402
+
+
+class DictBackend:
+    """Stand-in for the shared (Redis) backend."""
+    
+    def __init__(self):
+        self.entries = {}
+    
+    def get(self, key):
+        return self.entries.get(key)
+    
+    def set(self, key, value, ttl):
+        self.entries[key] = value
+
+
+def test_generation_bump_invalidates_cached_responses() -> None:
+    generation = {"value": 1}
+    builds = []
+    
+    def build():
+        builds.append(generation["value"])
+        return {"generation": generation["value"]}
+    
+    cache = ResponseCache(
+        local=LRUBackend(max_entries=8),
+        shared=DictBackend(),
+        generation_reader=lambda: generation["value"],
+        poll_seconds=0,
+    )
+    
+    assert cache.get_or_build("stats", build).body == b'{"generation":1}'
+    assert cache.get_or_build("stats", build).body == b'{"generation":1}'
+    assert builds == [1]
+    
+    generation["value"] = 2
+    assert cache.get_or_build("stats", build).body == b'{"generation":2}'
+    assert builds == [1, 2]
+
+
+def test_shared_backend_fills_local_cache() -> None:
+    shared = DictBackend()
+    first = ResponseCache(local=LRUBackend(), shared=shared, generation_reader=lambda: 1, poll_seconds=0)
+    second = ResponseCache(local=LRUBackend(), shared=shared, generation_reader=lambda: 1, poll_seconds=0)
+    
+    first.get_or_build("board:1", lambda: {"id": 1})
+    assert second.get_or_build("board:1", lambda: pytest.fail("should be served from the shared backend")).body == b'{"id":1}'
+
+
+def test_lru_backend_evicts_least_recently_used() -> None:
+    backend = LRUBackend(max_entries=2)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", ttl=60)
+    
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+
+def test_concurrent_misses_share_one_build() -> None:
+    import threading
+    
+    builds = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def build():
+        builds.append(1)
+        started.set()
+        release.wait(5)
+        return {"id": 1}
+    
+    cache = ResponseCache(local=LRUBackend(), generation_reader=lambda: 1, poll_seconds=60)
+    bodies = []
+    threads = [threading.Thread(target=lambda: bodies.append(cache.get_or_build("board:1", build).body)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert builds == [1]
+    assert bodies == [b'{"id":1}'] * 8
+
+
+def test_previous_generation_is_served_while_rebuilding() -> None:
+    import threading
+    
+    generation = {"value": 1}
+    building = threading.Event()
+    release = threading.Event()
+    
+    def slow_build():
+        building.set()
+        release.wait(5)
+        return {"generation": 2}
+    
+    cache = ResponseCache(local=LRUBackend(), generation_reader=lambda: generation["value"], poll_seconds=0, stale_seconds=30)
+    cache.get_or_build("stats", lambda: {"generation": 1})
+    
+    generation["value"] = 2
+    leader = threading.Thread(target=lambda: cache.get_or_build("stats", slow_build))
+    leader.start()
+    building.wait(5)
+    stale = cache.get_or_build("stats", lambda: pytest.fail("should not build twice"))
+    release.set()
+    leader.join()
+    
+    assert stale.body == b'{"generation":1}'
+    assert stale.headers["etag"] == '"1"'
+    fresh = cache.get_or_build("stats", lambda: pytest.fail("should be cached"))
+    assert fresh.body == b'{"generation":2}'
+    assert fresh.headers["etag"] == '"2"'
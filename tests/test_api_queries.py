@@ -0,0 +1,467 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from api.main import app, response_cache  # noqa: E402
+from db.connection import engine, get_db, init_db  # noqa: E402
+from db.models import Board, BoardItem, Repo, RepoSummary  # noqa: E402
+
+
+def _seed(repo_count: int) -> int:
+    with get_db() as db:
+        board = Board(name=f"Board {repo_count}", description="Test board")
+        db.add(board)
+        db.flush()
+        for i in range(repo_count):
+            repo = Repo(
+                url=f"https://github.com/owner/repo-{repo_count}-{i}",
+                full_name=f"owner/repo-{repo_count}-{i}",
+                name=f"repo-{repo_count}-{i}",
+                owner="owner",
+                description="A test repository",
+                stars=i,
+            )
+            db.add(repo)
+            db.flush()
+            db.add(RepoSummary(
+                repo_id=repo.id,
+                summary="A test repository used to check query counts. " * 3,
+                tags=["one", "two", "three", "four", "five"],
+                category="Developer Tools",
+                skill_level="beginner",
+                skill_level_numeric=2,
+                project_health="good",
+                project_health_score=0.8,
+            ))
+            db.add(BoardItem(board_id=board.id, repo_id=repo.id, rank_score=0.5, rank_position=i))
+        return board.id
+
+
+def _count_queries(client: TestClient, path: str) -> int:
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    # Measure the uncached path; the generation lookup adds one query per request
+    response_cache.local.clear()
+    response_cache.invalidate()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_endpoints_use_constant_queries() -> None:
+    init_db()
+    small_board = _seed(2)
+    large_board = _seed(20)
+    client = TestClient(app)
+    
+    assert _count_queries(client, f"/boards/{small_board}") == _count_queries(client, f"/boards/{large_board}")
+    assert _count_queries(client, "/repos?limit=2") == _count_queries(client, "/repos?limit=20")
+    client.get("/search?q=repo")  # Build the in-process search index once
+    assert _count_queries(client, "/search?q=repo&limit=2") == _count_queries(client, "/search?q=repo&limit=20")
+    assert _count_queries(client, f"/boards/{large_board}") <= 3 + 1
+    for view in ("card", "full"):
+        assert _count_queries(client, f"/boards/{small_board}?view={view}") == _count_queries(client, f"/boards/{large_board}?view={view}")
+        assert _count_queries(client, f"/repos?limit=2&view={view}") == _count_queries(client, f"/repos?limit=20&view={view}")
+
+
+def test_board_cache_serves_warm_reads_and_refreshes_after_bump() -> None:
+    from db.generation import bump_generation
+    
+    init_db()
+    board_id = _seed(3)
+    client = TestClient(app)
+    poll_seconds, response_cache.poll_seconds = response_cache.poll_seconds, 0
+    try:
+        client.get(f"/boards/{board_id}")
+        with get_db() as db:
+            db.query(Board).filter(Board.id == board_id).update({Board.name: "Renamed"})
+        assert client.get(f"/boards/{board_id}").json()["board"]["name"] == "Board 3"
+        
+        with get_db() as db:
+            bump_generation(db)
+        assert client.get(f"/boards/{board_id}").json()["board"]["name"] == "Renamed"
+    finally:
+        response_cache.poll_seconds = poll_seconds
+
+
+def test_cursor_pagination_walks_every_repo_once() -> None:
+    init_db()
+    _seed(7)
+    client = TestClient(app)
+    
+    expected = [item["repo"]["id"] for item in client.get("/repos?limit=1000").json()]
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/repos", params=params)
+        assert response.status_code == 200
+        seen.extend(item["repo"]["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert seen == expected
+    assert client.get("/repos", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def _walk(client: TestClient, path: str, params: dict, key) -> list:
+    """Follow X-Next-Cursor from the first page to the last, collecting keys."""
+    seen, cursor = [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen.extend(key(item) for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+def test_board_cursor_walk_has_no_duplicates_or_gaps() -> None:
+    init_db()
+    with get_db() as db:
+        db.add_all([Board(name=f"Walk board {i}", description="Cursor walk") for i in range(8)])
+    client = TestClient(app)
+    
+    expected = [board["id"] for board in client.get("/boards", params={"limit": 100}).json()]
+    seen = _walk(client, "/boards", {"limit": 3}, lambda board: board["id"])
+    assert seen == expected
+    assert len(set(seen)) == len(seen)
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_search_cursor_walk_over_tied_ranks() -> None:
+    from db.generation import bump_generation
+    
+    init_db()
+    with get_db() as db:
+        for i in range(9):
+            # Three relevance levels with three repos each, so pages split ties
+            name = "quokka-tool" if i % 3 == 0 else f"walk-search-{i}"
+            description = "quokka helper" if i % 3 == 1 else "plain helper"
+            db.add(Repo(url=f"https://github.com/owner/walk-search-{i}", full_name=f"owner/walk-search-{i}",
+                        name=name, owner="owner", description=description, topics=["quokka"], stars=i))
+        bump_generation(db)
+    response_cache.invalidate()
+    client = TestClient(app)
+    
+    expected = [item["repo"]["id"] for item in client.get("/search", params={"q": "quokka", "limit": 100}).json()]
+    assert len(expected) == 9
+    for limit in (1, 2, 4):
+        seen = _walk(client, "/search", {"q": "quokka", "limit": limit}, lambda item: item["repo"]["id"])
+        assert seen == expected
+    assert client.get("/search", params={"q": "quokka", "cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_rank_keyset_walk_over_tied_expression() -> None:
+    from api.pagination import paginate
+    
+    init_db()
+    _seed(13)
+    with get_db() as db:
+        # Same keyset shape as the tsvector ts_rank_cd path: a computed float with ties
+        query = db.query(Repo).filter(Repo.name.like("repo-13-%"))
+        rank = (Repo.stars % 3) * 0.5
+        expected = [repo.id for repo in query.order_by(rank.desc(), Repo.id.desc())]
+        seen, cursor = [], None
+        while True:
+            page = paginate(query, rank, Repo.id, "relevance", 4, cursor)
+            seen.extend(repo.id for repo in page.items)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+    
+    assert seen == expected
+    assert len(expected) == 13
+
+
+def test_semantic_search_hydrates_hits_in_one_query() -> None:
+    from api.main import get_semantic_search
+    
+    init_db()
+    _seed(4)
+    with get_db() as db:
+        hits = db.query(Repo.id, Repo.full_name).order_by(Repo.id.desc()).limit(3).all()
+    
+    class StubEmbedder:
+        def embed_query(self, query):
+            return [0.5, 0.25]
+        
+        def search_similar(self, vector, vector_db, limit=10):
+            return [{"id": repo_id, "score": 1.0 - i / 10} for i, (repo_id, _) in enumerate(hits[:limit])]
+    
+    app.dependency_overrides[get_semantic_search] = lambda: (StubEmbedder(), None)
+    try:
+        client = TestClient(app)
+        response = client.get("/search/semantic?q=web framework")
+        assert [item["repo"]["full_name"] for item in response.json()] == [name for _, name in hits]
+        assert response.json()[0]["score"] == 1.0
+        assert _count_queries(client, "/search/semantic?q=web framework") == 1
+    finally:
+        app.dependency_overrides.pop(get_semantic_search, None)
+
+
+def test_semantic_search_fills_the_limit_past_archived_hits() -> None:
+    from api.main import get_semantic_search
+    
+    init_db()
+    _seed(12)
+    with get_db() as db:
+        ranked = [repo_id for repo_id, in db.query(Repo.id).order_by(Repo.id.desc()).limit(12)]
+        db.query(Repo).filter(Repo.id.in_(ranked[:5])).update({Repo.archived: True}, synchronize_session=False)
+    requested = []
+    
+    class StubEmbedder:
+        def embed_query(self, query):
+            return [0.5, 0.25]
+        
+        def search_similar(self, vector, vector_db, limit=10):
+            requested.append(limit)
+            return [{"id": repo_id, "score": 1.0 - i / 100} for i, repo_id in enumerate(ranked[:limit])]
+    
+    app.dependency_overrides[get_semantic_search] = lambda: (StubEmbedder(), None)
+    try:
+        client = TestClient(app)
+        response = client.get("/search/semantic?q=archived&limit=3")
+        assert [item["repo"]["id"] for item in response.json()] == ranked[5:8]
+        # 6 candidates hold one live repo; the widened search finds the rest
+        assert requested == [6, 12]
+    finally:
+        app.dependency_overrides.pop(get_semantic_search, None)
+
+
+def test_query_embedding_cache_embeds_each_query_once() -> None:
+    query_cache = pytest.importorskip("embedding_service.query_cache")
+    
+    init_db()
+    embed_calls = []
+    
+    def embed(text):
+        embed_calls.append(text)
+        return [0.5, 0.25]
+    
+    cache = query_cache.QueryEmbeddingCache(embed, "stub-model")
+    assert cache.get("Web  Framework") == [0.5, 0.25]
+    assert cache.get("web framework") == [0.5, 0.25]
+    assert embed_calls == ["web framework"]
+    
+    # A fresh process still finds the vector in the table
+    fresh = query_cache.QueryEmbeddingCache(lambda text: pytest.fail("should not embed"), "stub-model")
+    assert fresh.get("WEB framework") == [0.5, 0.25]
+
+
+def test_similar_repos_are_one_query() -> None:
+    from db.models import RepoNeighbor
+    
+    init_db()
+    _seed(5)
+    with get_db() as db:
+        repos = db.query(Repo).order_by(Repo.id.desc()).limit(5).all()
+        source = repos[0]
+        for rank, neighbor in enumerate(repos[1:]):
+            db.add(RepoNeighbor(repo_id=source.id, neighbor_id=neighbor.id, rank=rank, score=0.9 - rank / 10))
+        source_id, full_name = source.id, source.full_name
+        expected = [neighbor.full_name for neighbor in repos[1:]]
+    
+    client = TestClient(app)
+    by_id = client.get(f"/repos/{source_id}/similar").json()
+    assert [item["repo"]["full_name"] for item in by_id] == expected
+    assert client.get(f"/repos/{full_name}/similar?limit=2").json() == by_id[:2]
+    # Plus the generation lookup behind the ETag
+    assert _count_queries(client, f"/repos/{source_id}/similar") == 1 + 1
+    assert _count_queries(client, f"/repos/{full_name}/similar") == 1 + 1
+
+
+def test_card_view_projects_columns_in_sql() -> None:
+    init_db()
+    board_id = _seed(6)
+    client = TestClient(app)
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        repos = client.get("/repos?view=card&limit=4").json()
+        board = client.get(f"/boards/{board_id}?fields=full_name,stars,summary").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    
+    assert set(repos[0]["repo"]) == {"id", "url", "full_name", "name", "owner", "description", "stars", "star_velocity", "topics"}
+    assert set(repos[0]["summary"]) == {"summary", "tags", "category", "skill_level"}
+    assert set(board["repos"][0]["repo"]) == {"full_name", "stars"}
+    repo_selects = [s for s in statements if "FROM repos" in s or "JOIN repos" in s]
+    assert repo_selects and not any("readme_preview" in s or "languages" in s for s in repo_selects)
+    assert client.get("/repos?fields=file_tree").status_code == 400
+
+
+def test_full_view_lists_return_the_full_readme_and_tree() -> None:
+    from shared.file_tree import encode_file_tree
+    
+    init_db()
+    board_id = _seed(14)
+    readme = "# Full README\n" + "x" * 5000
+    with get_db() as db:
+        repo = db.query(Repo).filter(Repo.name == "repo-14-0").one()
+        repo.readme = readme
+        repo.file_tree_compact = encode_file_tree([{"path": "src/app.py", "type": "blob", "size": 10}])
+        repo_id = repo.id
+    client = TestClient(app)
+    
+    full = {"view": "full"}
+    payloads = [
+        client.get("/repos/batch", params={"ids": str(repo_id), **full}).json()[0]["repo"],
+        client.get("/repos/by-name", params={"full_names": "owner/repo-14-0", **full}).json()[0]["repo"],
+        next(item["repo"] for item in client.get(f"/boards/{board_id}", params=full).json()["repos"] if item["repo"]["id"] == repo_id),
+        client.get(f"/repos/{repo_id}").json()["repo"],
+    ]
+    for payload in payloads:
+        assert payload["readme"] == readme
+        assert len(payload["readme_preview"]) < len(readme)
+        assert payload["file_tree"] == {"src": {"app.py": {"type": "blob", "size": 10}}}
+    
+    card = client.get("/repos/batch", params={"ids": str(repo_id)}).json()[0]["repo"]
+    assert "readme" not in card and "file_tree" not in card
+    preview = client.get("/repos/batch", params={"ids": str(repo_id), "fields": "readme_preview"}).json()[0]["repo"]
+    assert preview == {"readme_preview": payloads[0]["readme_preview"]}
+    assert _count_queries(client, "/repos/batch?view=full&ids=" + ",".join(str(i) for i in range(1, 30))) == 1 + 1
+
+
+def test_db_handlers_run_in_a_pool_sized_threadpool() -> None:
+    import inspect
+    
+    import anyio
+    from fastapi.routing import APIRoute
+    
+    from shared.config import settings
+    
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path not in ("/", "/metrics"):
+            assert not inspect.iscoroutinefunction(route.endpoint), route.path
+    
+    with TestClient(app) as client:
+        tokens = client.portal.call(lambda: anyio.to_thread.current_default_thread_limiter().total_tokens)
+    assert tokens == (settings.api_db_threads or settings.db_pool_size + settings.db_max_overflow)
+
+
+def test_stats_read_materialized_counters_and_reconcile_drift() -> None:
+    from collections import Counter
+    
+    from db.stats import apply_stat_deltas, compute_stats, reconcile_stats
+    
+    init_db()
+    _seed(8)
+    client = TestClient(app)
+    
+    client.get("/stats")  # Build the snapshot once
+    assert _count_queries(client, "/stats") <= 1 + 1
+    with get_db() as db:
+        exact = compute_stats(db)
+    stats = client.get("/stats").json()
+    assert stats["total_repos"] == exact["total_repos"]
+    assert stats["categories"] == exact["categories"]
+    assert stats["total_categories"] == len(exact["categories"])
+    
+    with get_db() as db:
+        apply_stat_deltas(db, repos=5, categories=Counter({"Developer Tools": -1}))
+    with get_db() as db:
+        drift = reconcile_stats(db)
+    assert drift["total_repos"] == -5
+    assert drift["categories"] == {"Developer Tools": 1}
+    with get_db() as db:
+        assert reconcile_stats(db) == {}
+
+
+def test_etag_revalidation_skips_the_database_and_large_bodies_are_compressed() -> None:
+    from db.generation import bump_generation
+    
+    init_db()
+    _seed(9)
+    client = TestClient(app)
+    
+    response = client.get("/boards?limit=10", headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, no-cache"
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        revalidated = client.get("/boards?limit=10", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert statements == []
+    
+    compressed = client.get("/repos?limit=50", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"].endswith('-gzip"')
+    assert compressed.json()
+    assert client.get("/repos?limit=50", headers={"If-None-Match": compressed.headers["etag"]}).status_code == 304
+    
+    with get_db() as db:
+        bump_generation(db)
+    response_cache.invalidate()
+    assert client.get("/boards?limit=10", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_batch_lookups_are_one_query_in_request_order() -> None:
+    init_db()
+    _seed(10)
+    with get_db() as db:
+        repos = [(repo.id, repo.full_name) for repo in db.query(Repo).filter(Repo.name.like("repo-10-%"))]
+    ids = [repo_id for repo_id, _ in repos][::-1]
+    names = [full_name for _, full_name in repos][::2]
+    client = TestClient(app)
+    
+    by_id = client.get(f"/repos/batch?ids={','.join(map(str, ids + [ids[0], 999999]))}").json()
+    assert [item["repo"]["id"] for item in by_id] == ids
+    assert all(item["summary"]["category"] == "Developer Tools" for item in by_id)
+    cards = client.get(f"/repos/by-name?full_names={','.join(names)}&fields=stars,summary").json()
+    assert [set(item["repo"]) for item in cards] == [{"stars"}] * len(names)
+    assert [item["summary"]["skill_level"] for item in cards] == ["beginner"] * len(names)
+    
+    # Plus the generation lookup behind the ETag
+    assert _count_queries(client, f"/repos/batch?ids={','.join(map(str, ids))}") == 1 + 1
+    assert _count_queries(client, f"/repos/by-name?full_names={','.join(names)}&view=card") == 1 + 1
+    assert client.get("/repos/batch?ids=1,x").status_code == 400
+    assert client.get("/repos/batch?ids=" + ",".join(str(i) for i in range(1000))).status_code == 400
+
+
+def test_metrics_report_route_latency_and_queries_per_request() -> None:
+    from api.metrics import REQUEST_DB_QUERIES, REQUEST_SECONDS
+    from db.metrics import POOL_CHECKOUT_WAIT_SECONDS
+    
+    init_db()
+    board_id = _seed(11)
+    client = TestClient(app)
+    
+    before = REQUEST_DB_QUERIES.count(route="/boards/{board_id}")
+    queries = _count_queries(client, f"/boards/{board_id}")
+    assert REQUEST_DB_QUERIES.count(route="/boards/{board_id}") == before + 1
+    assert REQUEST_SECONDS.count(route="/boards/{board_id}", method="GET") >= 1
+    assert POOL_CHECKOUT_WAIT_SECONDS.count() >= 1
+    
+    body = client.get("/metrics").text
+    assert 'repoboard_http_request_duration_seconds_bucket{route="/boards/{board_id}",method="GET",le="+Inf"}' in body
+    assert f'repoboard_http_request_db_queries_bucket{{route="/boards/{{board_id}}",le="{queries}"}}' in body
+    assert 'repoboard_cache_lookups_total{cache="response",result="miss"}' in body
+    assert "# TYPE repoboard_db_pool_checked_out gauge" in body
@@ -0,0 +1,46 @@
+from shared.file_tree import (
+    decode_file_tree,
+    encode_file_tree,
+    file_tree_features,
+    file_tree_from_nested,
+    file_tree_to_nested,
+)
+
+TREE = [
+    {"path": "src", "type": "tree"},
+    {"path": "src/app.py", "type": "blob", "size": 120},
+    {"path": "tests/test_app.py", "type": "blob", "size": 40},
+    {"path": ".github/workflows/ci.yml", "type": "blob", "size": 10},
+]
+
+
+def test_encode_roundtrip() -> None:
+    decoded = decode_file_tree(encode_file_tree(TREE))
+    assert decoded[0] == ("src", "tree", 0)
+    assert decoded[1] == ("src/app.py", "blob", 120)
+    assert decode_file_tree(encode_file_tree(TREE, compress=False)) == decoded
+
+
+def test_nested_view() -> None:
+    nested = file_tree_to_nested(encode_file_tree(TREE))
+    assert nested["src"]["app.py"] == {"type": "blob", "size": 120}
+    assert file_tree_to_nested(None) is None
+
+
+def test_legacy_nested_tree_flattens_back() -> None:
+    nested = file_tree_to_nested(encode_file_tree(TREE))
+    tree = file_tree_from_nested(nested)
+    assert tree[:2] == [{"path": "src", "type": "tree", "size": 0}, TREE[1]]
+    assert {"path": "tests", "type": "tree", "size": 0} in tree
+    assert file_tree_features(tree)["file_count"] == 3
+    assert file_tree_from_nested(None) == []
+
+
+def test_features() -> None:
+    features = file_tree_features(TREE)
+    assert features["file_count"] == 3
+    assert features["dir_count"] == 1
+    assert features["total_size"] == 170
+    assert features["extensions"] == {".py": 2, ".yml": 1}
+    assert features["has_tests"] and features["has_ci"]
+    assert not features["has_docs"]
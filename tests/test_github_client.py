@@ -0,0 +1,248 @@
+import json
+from urllib.parse import urlparse
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("sqlalchemy")
+
+from ingestion_service.github_client import GitHubClient  # noqa: E402
+
+
+BASE_URL = "https://api.github.test"
+
+
+def _response(status: int = 200, body=None, text=None, headers=None) -> "requests.Response":
+    response = requests.Response()
+    response.status_code = status
+    response._content = (text if text is not None else json.dumps(body)).encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeGitHub:
+    """Stands in for client.session: routes requests by path to canned responses."""
+    
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+    
+    def request(self, method, url, headers=None, **kwargs):
+        self.calls.append((method, url, dict(headers or {})))
+        route = self.routes.get(urlparse(url).path)
+        if route is None:
+            return _response(404, {"message": "Not Found"})
+        return route(url, headers or {}) if callable(route) else route
+    
+    def close(self):
+        pass
+
+
+def _client(routes, **kwargs) -> GitHubClient:
+    client = GitHubClient(token="test-token", base_url=BASE_URL, use_graphql=False, **kwargs)
+    client.session = FakeGitHub(routes)
+    return client
+
+
+def _repo_data(owner: str = "octo", name: str = "widget") -> dict:
+    return {
+        "owner": {"login": owner},
+        "name": name,
+        "full_name": f"{owner}/{name}",
+        "html_url": f"https://github.com/{owner}/{name}",
+        "description": "A widget",
+        "stargazers_count": 120,
+        "created_at": "2024-01-01T00:00:00Z",
+        "pushed_at": "2024-06-01T00:00:00Z",
+        "default_branch": "main",
+        "topics": ["widgets"],
+    }
+
+
+def _repo_routes(owner: str = "octo", name: str = "widget") -> dict:
+    prefix = f"/repos/{owner}/{name}"
+    return {
+        f"{prefix}/readme": _response(text="# Widget\n\nDoes widget things."),
+        f"{prefix}/languages": _response(body={"Python": 300, "Shell": 100}),
+        f"{prefix}/git/trees/main": _response(body={"tree": [
+            {"path": "src", "type": "tree"},
+            {"path": "src/widget.py", "type": "blob", "size": 1200},
+            {"path": "tests/test_widget.py", "type": "blob", "size": 300},
+        ]}),
+        f"{prefix}/commits": _response(body=[{}], headers={
+            "Link": f'<{BASE_URL}{prefix}/commits?per_page=1&page=2>; rel="next", '
+                    f'<{BASE_URL}{prefix}/commits?per_page=1&page=42>; rel="last"',
+        }),
+        f"{prefix}/contributors": _response(body=[{}], headers={
+            "Link": f'<{BASE_URL}{prefix}/contributors?per_page=1&anon=true&page=7>; rel="last"',
+        }),
+    }
+
+
+def test_fetch_repo_metadata_assembles_all_sub_resources() -> None:
+    client = _client(_repo_routes())
+    try:
+        [metadata] = client.fetch_repos_metadata([_repo_data()])
+    finally:
+        client.close()
+    
+    assert metadata.full_name == "octo/widget"
+    assert metadata.readme.startswith("# Widget")
+    assert metadata.languages == {"Python": 0.75, "Shell": 0.25}
+    assert metadata.file_tree_compact
+    assert metadata.file_tree_features["file_count"] == 2
+    assert metadata.commit_count == 42
+    assert metadata.contributor_count == 7
+    assert {urlparse(url).path for _, url, _ in client.session.calls} == set(_repo_routes())
+
+
+def test_failing_sub_request_keeps_the_record() -> None:
+    routes = _repo_routes()
+    routes["/repos/octo/widget/languages"] = _response(500, {"message": "Server Error"})
+    client = _client(routes)
+    try:
+        [metadata] = client.fetch_repos_metadata([_repo_data()])
+    finally:
+        client.close()
+    
+    assert metadata is not None
+    assert metadata.languages == {}
+    assert metadata.readme.startswith("# Widget")
+    assert metadata.commit_count == 42
+
+
+class DictCache:
+    """In-memory stand-in for the persistent ResponseCache."""
+    
+    def __init__(self):
+        self.entries = {}
+    
+    def get(self, url):
+        return self.entries.get(url)
+    
+    def set(self, url, etag, last_modified, body):
+        self.entries[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+
+
+def test_conditional_requests_serve_304_from_cache() -> None:
+    responses = {
+        "/repos/octo/widget": [
+            _response(body={"id": 1, "stargazers_count": 10}, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            _response(304, text=""),
+        ],
+        "/repos/octo/widget/readme": [_response(text="# Raw README", headers={"ETag": '"r1"'})],
+    }
+    cache = DictCache()
+    client = _client({path: (lambda url, headers, queue=queue: queue.pop(0)) for path, queue in responses.items()}, cache=cache)
+    try:
+        first = client.get_repo_details("octo", "widget")
+        second = client.get_repo_details("octo", "widget")
+        readme = client.get_repo_readme("octo", "widget")
+    finally:
+        client.close()
+    
+    assert first == second == {"id": 1, "stargazers_count": 10}
+    assert readme == "# Raw README"
+    first_headers, second_headers = client.session.calls[0][2], client.session.calls[1][2]
+    assert "If-None-Match" not in first_headers
+    assert second_headers["If-None-Match"] == '"v1"'
+    assert second_headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    # JSON and raw bodies are cached under separate keys
+    assert set(cache.entries) == {f"{BASE_URL}/repos/octo/widget", f"{BASE_URL}/repos/octo/widget/readme#raw"}
+
+
+def _graphql_node(owner: str, name: str) -> dict:
+    """A repository node without any README alias match (e.g. docs/README.md)."""
+    return {
+        "url": f"https://github.com/{owner}/{name}",
+        "nameWithOwner": f"{owner}/{name}",
+        "name": name,
+        "owner": {"login": owner},
+        "description": "A widget",
+        "stargazerCount": 150,
+        "forkCount": 3,
+        "watchers": {"totalCount": 5},
+        "issues": {"totalCount": 1},
+        "createdAt": "2024-01-01T00:00:00Z",
+        "updatedAt": "2024-06-02T00:00:00Z",
+        "pushedAt": "2024-06-01T00:00:00Z",
+        "defaultBranchRef": {"name": "main", "target": {"history": {"totalCount": 42}}},
+        "repositoryTopics": {"nodes": [{"topic": {"name": "widgets"}}]},
+        "licenseInfo": None,
+        "isArchived": False,
+        "languages": {"totalSize": 400, "edges": [{"size": 300, "node": {"name": "Python"}}, {"size": 100, "node": {"name": "Shell"}}]},
+    }
+
+
+def test_graphql_ingest_makes_no_rest_calls_and_keeps_stored_fields() -> None:
+    from db.connection import get_db, init_db
+    from db.models import Repo
+    from ingestion_service.change_detection import apply_content_hashes
+    from ingestion_service.ingester import RepoIngester
+    from ingestion_service.repo_writer import RepoWriter
+    
+    init_db()
+    owner, names = "octo", ["graphql-widget", "graphql-gadget", "graphql-gizmo"]
+    routes = _repo_routes(owner, names[0])
+    
+    rest = _client(routes)
+    try:
+        [stored] = rest.fetch_repos_metadata([_repo_data(owner, names[0])])
+    finally:
+        rest.close()
+    [repo_id] = RepoWriter().write([apply_content_hashes(stored)])
+    
+    nodes = {f"r{i}": _graphql_node(owner, name) for i, name in enumerate(names)}
+    nodes["r1"]["readmeMd"] = {"text": "# Gadget"}
+    routes["/graphql"] = _response(body={"data": nodes})
+    routes["/search/repositories"] = _response(body={"items": [_repo_data(owner, name) for name in names]})
+    batch = GitHubClient(token="test-token", base_url=BASE_URL, use_graphql=True)
+    batch.session = FakeGitHub(routes)
+    ingester = RepoIngester()
+    ingester.github_client = batch
+    try:
+        ids = ingester.ingest_trending(limit=10, incremental=False, resume=False)
+    finally:
+        batch.close()
+    
+    # One search page and one GraphQL query for all N repos
+    assert [urlparse(url).path for _, url, _ in batch.session.calls] == ["/search/repositories", "/graphql"]
+    assert ids[0] == repo_id
+    with get_db() as db:
+        repos = {repo.name: repo for repo in db.query(Repo).filter(Repo.id.in_(ids))}
+        kept = repos[names[0]]
+        assert kept.stars == 150
+        assert kept.readme == stored.readme
+        assert kept.file_tree_compact == stored.file_tree_compact
+        assert kept.file_tree_features == stored.file_tree_features
+        assert kept.contributor_count == 7
+        assert kept.content_hash == stored.content_hash
+        assert repos[names[1]].readme == "# Gadget"
+        assert repos[names[2]].readme is None and repos[names[2]].file_tree_compact is None
+
+
+def test_count_items_reads_the_last_page_number() -> None:
+    prefix = "/repos/octo/counted"
+    routes = {
+        f"{prefix}/commits": _response(body=[{}], headers={
+            "Link": f'<{BASE_URL}{prefix}/commits?per_page=1&page=2>; rel="next", '
+                    f'<{BASE_URL}{prefix}/commits?per_page=1&page=1234>; rel="last"',
+        }),
+        f"{prefix}/contributors": _response(body=[{"login": "solo"}]),
+        f"{prefix}/pulls": _response(body=[]),
+        "/repos/octo/empty/commits": _response(409, {"message": "Git Repository is empty."}),
+    }
+    client = _client(routes)
+    try:
+        assert client._count_items(f"{prefix}/commits", {"since": "2024-01-01T00:00:00"}) == 1234
+        assert client._count_items(f"{prefix}/contributors") == 1
+        assert client._count_items(f"{prefix}/pulls") == 0
+        assert client._count_items("/repos/octo/empty/commits") == 0
+        assert client.get_repo_commits("octo", "empty") == 0
+    finally:
+        client.close()
+    
+    # One request per count, asking for a single item per page
+    commits_url = client.session.calls[0][1]
+    assert "per_page=1" in commits_url and "since=2024-01-01" in commits_url
+    assert len(client.session.calls) == 5
@@ -0,0 +1,311 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("requests")
+
+from db.connection import get_db, init_db  # noqa: E402
+from db.models import Repo, RepoStarSnapshot  # noqa: E402
+from ingestion_service.repo_writer import RepoWriter  # noqa: E402
+from shared.schemas import RepoMetadata  # noqa: E402
+
+
+def _metadata(name: str, stars: int = 10, **fields) -> RepoMetadata:
+    return RepoMetadata(
+        url=f"https://github.com/ingest/{name}",
+        full_name=f"ingest/{name}",
+        name=name,
+        owner="ingest",
+        stars=stars,
+        **fields,
+    )
+
+
+def _snapshot_count(repo_ids) -> int:
+    with get_db() as db:
+        return db.query(RepoStarSnapshot).filter(RepoStarSnapshot.repo_id.in_(list(repo_ids))).count()
+
+
+def test_writer_upserts_by_url_across_chunks() -> None:
+    init_db()
+    writer = RepoWriter(chunk_size=2)
+    
+    first_ids = writer.write([_metadata(f"chunked-{i}", stars=i, languages={"Go": 1.0}) for i in range(5)])
+    assert len(set(first_ids)) == 5
+    assert _snapshot_count(first_ids) == 5
+    
+    # Same URLs again, reordered, with a duplicate inside one chunk: ids follow input order
+    records = [_metadata(f"chunked-{i}", stars=100 + i) for i in (4, 3, 3, 0, 1, 2)]
+    assert writer.write(records) == [first_ids[i] for i in (4, 3, 3, 0, 1, 2)]
+    assert _snapshot_count(first_ids) == 10
+    
+    with get_db() as db:
+        stars = dict(db.query(Repo.id, Repo.stars).filter(Repo.id.in_(first_ids)))
+    assert stars == {first_ids[i]: 100 + i for i in range(5)}
+
+
+def test_writer_exclude_keeps_stored_content() -> None:
+    init_db()
+    writer = RepoWriter()
+    [repo_id] = writer.write([_metadata("excluded", readme="# Stored", languages={"Rust": 1.0})])
+    writer.write([_metadata("excluded", stars=99)], exclude={"readme", "languages"})
+    
+    with get_db() as db:
+        repo = db.query(Repo).filter(Repo.id == repo_id).one()
+        assert (repo.stars, repo.readme, repo.languages) == (99, "# Stored", {"Rust": 1.0})
+
+
+def test_writer_applies_stat_deltas_once_per_row() -> None:
+    from sqlalchemy import event
+    from db.connection import engine
+    from db.stats import read_stats
+    
+    init_db()
+    with get_db() as db:
+        before = read_stats(db)
+    writer = RepoWriter(chunk_size=2)
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        writer.write([_metadata(f"stats-{i}", languages={"Zig": 1.0}) for i in range(3)] + [_metadata("stats-0")])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    writer.write([_metadata(f"stats-{i}", stars=50, languages={"Zig": 1.0}) for i in range(3)])
+    
+    # Two chunk transactions, then the counters and generation once, after both
+    stats_updates = [i for i, statement in enumerate(statements) if statement.startswith("UPDATE stats")]
+    generation_bumps = [i for i, statement in enumerate(statements) if statement.startswith("UPDATE data_generations")]
+    repo_upserts = [i for i, statement in enumerate(statements) if statement.startswith("INSERT INTO repos")]
+    assert len(repo_upserts) == 2 and stats_updates and min(stats_updates) > max(repo_upserts)
+    assert sum("total_repos" in statements[i] for i in stats_updates) == 1
+    assert len(generation_bumps) == 1 and generation_bumps[0] > max(repo_upserts)
+    
+    with get_db() as db:
+        after = read_stats(db)
+    assert after["total_repos"] == before["total_repos"] + 3
+    assert after["languages"]["Zig"] == before["languages"].get("Zig", 0) + 3
+
+
+def test_merge_fallback_inserts_then_updates() -> None:
+    init_db()
+    writer = RepoWriter()
+    row = writer._to_row(_metadata("merged", stars=1), set())
+    with get_db() as db:
+        inserted = writer._merge_chunk(db, [row])
+    with get_db() as db:
+        updated = writer._merge_chunk(db, [dict(row, stars=2)])
+        assert db.query(Repo.stars).filter(Repo.id == updated[row["url"]]).scalar() == 2
+    assert inserted == updated
+
+
+def _hit(name: str, pushed_at: str = "2024-06-01T00:00:00Z", stars: int = 10) -> dict:
+    return {
+        "owner": {"login": "ingest"},
+        "name": name,
+        "full_name": f"ingest/{name}",
+        "html_url": f"https://github.com/ingest/{name}",
+        "stargazers_count": stars,
+        "created_at": "2024-01-01T00:00:00Z",
+        "pushed_at": pushed_at,
+    }
+
+
+class StubGitHub:
+    """Search and enrichment without the network; records which hits were fully fetched."""
+    
+    def __init__(self, hits):
+        self.hits = hits
+        self.fetched = []
+    
+    def get_trending_repos(self, language=None):
+        return list(self.hits)
+    
+    def iter_trending_pages(self, language=None, max_pages=10):
+        for start in range(0, len(self.hits), 2):
+            yield self.hits[start:start + 2]
+    
+    def build_repo_metadata(self, repo_data, readme=None, **fields):
+        return RepoMetadata(
+            url=repo_data["html_url"],
+            full_name=repo_data["full_name"],
+            name=repo_data["name"],
+            owner=repo_data["owner"]["login"],
+            stars=repo_data["stargazers_count"],
+            pushed_at=repo_data["pushed_at"],
+            readme=readme,
+        )
+    
+    def fetch_repos_metadata(self, repos_data):
+        self.fetched.extend(repo_data["name"] for repo_data in repos_data)
+        return [self.build_repo_metadata(repo_data, readme=f"# {repo_data['name']} {repo_data['pushed_at']}") for repo_data in repos_data]
+    
+    def fetch_repo_metadata(self, repo_data):
+        return self.fetch_repos_metadata([repo_data])[0]
+    
+    def unfetched_fields(self, metadata):
+        return set()
+
+
+def _ingester(hits):
+    from ingestion_service.ingester import RepoIngester
+    
+    ingester = RepoIngester()
+    ingester.github_client = StubGitHub(hits)
+    return ingester
+
+
+def test_content_changed_compares_push_then_update_times() -> None:
+    from datetime import datetime
+    
+    from ingestion_service.change_detection import content_changed
+    
+    stored = {"pushed_at": datetime(2024, 6, 1), "updated_at": datetime(2024, 6, 2), "content_hashes": {"readme": "x"}}
+    assert content_changed({"pushed_at": "2024-06-01T00:00:00Z"}, None)
+    assert content_changed({"pushed_at": "2024-06-01T00:00:00Z"}, dict(stored, content_hashes={}))
+    assert not content_changed({"pushed_at": "2024-06-01T00:00:00Z"}, stored)
+    assert content_changed({"pushed_at": "2024-06-01T00:00:01Z"}, stored)
+    assert not content_changed({"updated_at": "2024-06-01T00:00:00Z"}, stored)
+    assert content_changed({"updated_at": "2024-06-03T00:00:00Z"}, stored)
+
+
+def test_incremental_ingest_refetches_only_pushed_repos_in_input_order() -> None:
+    init_db()
+    names = ["incremental-a", "incremental-b", "incremental-c"]
+    ingester = _ingester([_hit(name) for name in names])
+    first = ingester.ingest_trending(limit=10, incremental=False, resume=False)
+    assert ingester.github_client.fetched == names
+    
+    hits = [_hit(names[0], stars=20), _hit(names[1], pushed_at="2024-07-01T00:00:00Z", stars=20), _hit(names[2], stars=20)]
+    ingester.github_client = StubGitHub(hits)
+    assert ingester.ingest_trending(limit=10, incremental=True, resume=False) == first
+    assert ingester.github_client.fetched == [names[1]]
+    
+    with get_db() as db:
+        repos = {repo.name: repo for repo in db.query(Repo).filter(Repo.id.in_(first))}
+        assert all(repo.stars == 20 for repo in repos.values())
+        assert repos[names[0]].readme == f"# {names[0]} 2024-06-01T00:00:00Z"
+        assert repos[names[1]].readme == f"# {names[1]} 2024-07-01T00:00:00Z"
+
+
+def test_streaming_ingest_reads_stored_state_once_per_search_page() -> None:
+    from sqlalchemy import event
+    from db.connection import engine
+    
+    init_db()
+    names = [f"streamed-{i}" for i in range(5)]
+    ingester = _ingester([_hit(name) for name in names])
+    first = sorted(ingester.stream_trending(incremental=False))
+    assert sorted(ingester.github_client.fetched) == names
+    
+    hits = [_hit(name, pushed_at="2024-07-01T00:00:00Z" if name == names[3] else "2024-06-01T00:00:00Z") for name in names]
+    ingester.github_client = StubGitHub(hits)
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert sorted(ingester.stream_trending(incremental=True)) == first
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert ingester.github_client.fetched == [names[3]]
+    # Stub pages hold two hits: 2 + 2 + 1
+    assert sum(statement.startswith("SELECT repos.url") and "repos.content_hashes" in statement for statement in statements) == 3
+
+
+def test_summaries_without_source_hash_are_stale() -> None:
+    from ingestion_service.change_detection import needs_summary_filter
+    from db.models import RepoSummary
+    
+    init_db()
+    writer = RepoWriter()
+    ids = writer.write([_metadata(f"summary-{i}") for i in range(4)])
+    hashes = ["a" * 64, "b" * 64, "c" * 64, None]
+    with get_db() as db:
+        for repo_id, content_hash in zip(ids, hashes):
+            db.query(Repo).filter(Repo.id == repo_id).update({Repo.content_hash: content_hash})
+        for repo_id, source_hash in zip(ids, ["a" * 64, None, "x" * 64, None]):
+            db.add(RepoSummary(
+                repo_id=repo_id, summary="s", tags=[], category="c", skill_level="beginner",
+                skill_level_numeric=1, project_health="good", project_health_score=0.5, source_hash=source_hash,
+            ))
+    with get_db() as db:
+        stale = {repo_id for repo_id, in db.query(Repo.id).outerjoin(RepoSummary).filter(
+            needs_summary_filter(), Repo.id.in_(ids)
+        )}
+    # Current hash: fresh; legacy NULL source hash: stale; different hash: stale;
+    # repo not hashed yet: left alone
+    assert stale == {ids[1], ids[2]}
+
+
+def test_failed_chunk_is_refetched_on_resume(monkeypatch) -> None:
+    from db.models import IngestionRun
+    from shared.config import settings
+    
+    init_db()
+    monkeypatch.setattr(settings, "ingestion_checkpoint_size", 2)
+    names = [f"resume-{i}" for i in range(5)]
+    # Overlapping search pages repeat a hit; the journal must not
+    ingester = _ingester([_hit(name) for name in names] + [_hit(names[1])])
+    write = ingester.writer.write
+    
+    def failing_write(records, **kwargs):
+        if any(metadata.name == names[2] for metadata in records):
+            raise RuntimeError("connection reset")
+        return write(records, **kwargs)
+    
+    monkeypatch.setattr(ingester.writer, "write", failing_write)
+    first = ingester.ingest_trending(language="ResumeLang", limit=10, incremental=False)
+    assert ingester.github_client.fetched == names
+    assert len(first) == 3
+    
+    run_id = ingester.journal.find_resumable("ResumeLang")
+    assert run_id is not None
+    monkeypatch.setattr(ingester.writer, "write", write)
+    ingester.github_client = StubGitHub([])
+    resumed = ingester.ingest_trending(language="ResumeLang", limit=10, incremental=False)
+    assert ingester.github_client.fetched == names[2:4]
+    assert len(resumed) == 2
+    
+    assert ingester.journal.find_resumable("ResumeLang") is None
+    with get_db() as db:
+        assert db.query(IngestionRun.status).filter(IngestionRun.run_id == run_id).scalar() == "completed"
+
+
+def test_star_velocity_windows_use_the_latest_old_enough_snapshot() -> None:
+    from datetime import datetime, timedelta
+    
+    from ingestion_service.star_history import StarHistory
+    
+    init_db()
+    ids = RepoWriter().write([_metadata(f"velocity-{i}") for i in range(5)])
+    steady, young, fresh, new, lapsed = ids
+    now = datetime(2024, 3, 1, 12, 0)
+    history = StarHistory()
+    with get_db() as db:
+        db.query(RepoStarSnapshot).filter(RepoStarSnapshot.repo_id.in_(ids)).delete(synchronize_session=False)
+        for days, stars in ((40, 0), (31, 90), (8, 200), (2, 300)):
+            history.record(db, {steady: stars}, now - timedelta(days=days))
+        for days, stars in ((45, 0), (10, 100)):
+            history.record(db, {lapsed: stars}, now - timedelta(days=days))
+        history.record(db, {young: 10}, now - timedelta(hours=3))
+        history.record(db, {fresh: 10}, now - timedelta(minutes=30))
+        
+        velocities = history.record(db, {steady: 400, young: 16, fresh: 20, new: 5, lapsed: 200}, now)
+    
+    assert velocities[steady] == {"star_velocity_1d": 50.0, "star_velocity_7d": 25.0, "star_velocity_30d": 10.0}
+    # No snapshot older than the window: extrapolate from the oldest one
+    assert velocities[young] == dict.fromkeys(velocities[steady], 48.0)
+    # Snapshots beyond the 30 days plus slack are never read
+    assert velocities[lapsed] == dict.fromkeys(velocities[steady], 10.0)
+    # Under an hour of history, or none at all: no velocity yet
+    assert velocities[fresh] == velocities[new] == dict.fromkeys(velocities[steady])
+    
+    with get_db() as db:
+        stored = db.query(Repo.star_velocity_7d).filter(Repo.id == steady).scalar()
+    assert stored == 25.0
+    assert _snapshot_count([steady]) == 5
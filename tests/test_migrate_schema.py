@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, inspect, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db.models import Repo  # noqa: E402
+from jobs.migrate_schema import main as migrate  # noqa: E402
+
+
+LEGACY_TREE = {
+    "src": {"type": "tree", "size": 0, "app.py": {"type": "blob", "size": 120}},
+    "docs": {"type": "tree", "size": 0, "index.md": {"type": "blob", "size": 30}},
+}
+
+
+def _legacy_engine(tmp_path):
+    """A repos table as created before the compact and compressed columns existed."""
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE repos (id INTEGER PRIMARY KEY, url VARCHAR(500) NOT NULL UNIQUE, "
+            "full_name VARCHAR(255) NOT NULL, name VARCHAR(255) NOT NULL, owner VARCHAR(255) NOT NULL, "
+            "stars INTEGER, readme TEXT, file_tree JSON)"
+        ))
+        conn.execute(text(
+            "INSERT INTO repos (id, url, full_name, name, owner, stars, readme, file_tree) "
+            "VALUES (1, 'https://github.com/old/app', 'old/app', 'app', 'old', 5, :readme, :tree)"
+        ), {"readme": "# Legacy app\n" + "x" * 3000, "tree": json.dumps(LEGACY_TREE)})
+    return engine
+
+
+def test_migration_adds_columns_and_converts_legacy_content(tmp_path) -> None:
+    engine = _legacy_engine(tmp_path)
+    result = migrate(engine)
+    
+    columns = {column["name"] for column in inspect(engine).get_columns("repos")}
+    assert {"file_tree_compact", "file_tree_features", "readme_compressed", "search_vector"} <= columns
+    assert "repos.file_tree_compact" in result["columns"]
+    assert "idx_repo_stars_id" in {index["name"] for index in inspect(engine).get_indexes("repos")}
+    assert result["file_trees"] == result["readmes"] == 1
+    
+    session = sessionmaker(bind=engine)()
+    try:
+        repo = session.query(Repo).one()
+        assert repo.file_tree_features["file_count"] == 2
+        assert repo.file_tree_features["has_docs"]
+        assert repo.file_tree_compact
+        assert repo.readme.startswith("# Legacy app") and len(repo.readme) == 3013
+        assert len(repo.readme_preview) < len(repo.readme)
+    finally:
+        session.close()
+    
+    # Converted rows are skipped on a second run
+    assert migrate(engine) == {"columns": [], "file_trees": 0, "readmes": 0}
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from ingestion_service.pipeline import StreamingPipeline
+
+
+class CountingSource:
+    """Lazy source that records how many items the pipeline has pulled."""
+    
+    def __init__(self, count: int):
+        self.count = count
+        self.pulled = 0
+    
+    def __iter__(self):
+        for item in range(self.count):
+            self.pulled += 1
+            yield item
+
+
+class RecordingWriter:
+    """Write stage stand-in: keeps each batch and returns an id per record."""
+    
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, batch):
+        with self.lock:
+            self.batches.append(list(batch))
+        return [item * 10 for item in batch]
+
+
+def test_full_queues_stop_the_source_while_writes_are_not_consumed() -> None:
+    source = CountingSource(1000)
+    writer = RecordingWriter()
+    pipeline = StreamingPipeline(enrich=lambda item: item, write=writer, enrich_workers=1,
+                                 queue_size=2, batch_size=2, flush_interval=60)
+    ids = pipeline.run(source)
+    
+    assert next(ids) == 0
+    time.sleep(0.3)
+    # First batch, both queues, and one item held by each blocked stage
+    assert source.pulled <= 2 + 2 + 1 + 2 + 1
+    assert sorted(ids) == [item * 10 for item in range(1, 1000)]
+    assert source.pulled == 1000
+
+
+def test_enrichment_errors_skip_the_record_and_the_last_batch_is_flushed() -> None:
+    def enrich(item):
+        if item == 3:
+            raise RuntimeError("readme fetch failed")
+        return None if item == 4 else item
+    
+    writer = RecordingWriter()
+    pipeline = StreamingPipeline(enrich=enrich, write=writer, enrich_workers=3,
+                                 queue_size=4, batch_size=3, flush_interval=60)
+    ids = list(pipeline.run(iter(range(8))))
+    
+    assert sorted(ids) == [0, 10, 20, 50, 60, 70]
+    assert [len(batch) for batch in writer.batches] == [3, 3]
+
+
+def test_short_final_batch_and_failed_writes() -> None:
+    writer = RecordingWriter()
+    
+    def flaky_write(batch):
+        if 0 in batch:
+            raise RuntimeError("deadlock detected")
+        return writer(batch)
+    
+    pipeline = StreamingPipeline(enrich=lambda item: item, write=flaky_write, enrich_workers=1,
+                                 queue_size=10, batch_size=4, flush_interval=60)
+    assert list(pipeline.run(range(6))) == [40, 50]
+    assert writer.batches == [[4, 5]]
@@ -0,0 +1,92 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from ingestion_service.rate_limiter import SECONDARY_LIMIT_BACKOFF, RateLimitScheduler  # noqa: E402
+
+
+class FakeClock:
+    """Time that only moves when the scheduler waits."""
+    
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.waits = []
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def wait(self, timeout: float) -> None:
+        self.waits.append(round(timeout, 3))
+        self.now += timeout
+
+
+def _scheduler(tokens=("a", "b")):
+    clock = FakeClock()
+    scheduler = RateLimitScheduler(list(tokens), clock=clock)
+    scheduler._condition.wait = clock.wait
+    return scheduler, clock
+
+
+def _response(status: int = 200, headers=None, text: str = "") -> "requests.Response":
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+def _limits(remaining: int, limit: int = 5000, reset: float = 0) -> dict:
+    return {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset)}
+
+
+def test_requests_rotate_to_the_token_with_most_headroom() -> None:
+    scheduler, clock = _scheduler()
+    first = scheduler.acquire()
+    assert not scheduler.update(first, _response(headers=_limits(100, reset=clock.now + 3600)))
+    second = scheduler.acquire()
+    assert second.token != first.token
+    assert not scheduler.update(second, _response(headers=_limits(50, reset=clock.now + 3600)))
+    assert scheduler.acquire().token == first.token
+    assert clock.waits == []
+
+
+def test_retry_after_and_exhausted_403_block_the_token() -> None:
+    scheduler, clock = _scheduler()
+    bucket = scheduler.acquire()
+    assert scheduler.update(bucket, _response(429, {"Retry-After": "30"}))
+    assert bucket.blocked_until == clock.now + 30
+    assert scheduler.acquire().token != bucket.token
+    
+    other = scheduler.acquire()
+    assert scheduler.update(other, _response(403, _limits(0, reset=clock.now + 900)))
+    assert other.blocked_until == clock.now + 900
+    
+    scheduler, clock = _scheduler(["a"])
+    bucket = scheduler.acquire()
+    assert scheduler.update(bucket, _response(403, text="You have exceeded a secondary rate limit"))
+    assert bucket.blocked_until == clock.now + SECONDARY_LIMIT_BACKOFF
+    assert not scheduler.update(bucket, _response(403, text="Resource not accessible"))
+
+
+@pytest.mark.parametrize("retry_after", [1, 2])
+def test_wakes_for_a_blocked_token_that_frees_up_before_a_paced_one(retry_after: int) -> None:
+    scheduler, clock = _scheduler()
+    paced, blocked = scheduler._pool("core")
+    scheduler.update(blocked, _response(429, {"Retry-After": str(retry_after)}))
+    # Low budget with a distant reset: the next call on this token is ~5s away
+    scheduler.update(paced, _response(headers=_limits(100, limit=1000, reset=clock.now + 500)))
+    assert scheduler.acquire() is paced
+    assert paced.next_allowed > clock.now + 4.9
+    
+    assert scheduler.acquire() is blocked
+    assert clock.waits == [retry_after]
+
+
+def test_exhausted_tokens_wake_at_the_earliest_reset() -> None:
+    scheduler, clock = _scheduler()
+    first, second = scheduler._pool("core")
+    scheduler.update(first, _response(headers=_limits(0, reset=clock.now + 120)))
+    scheduler.update(second, _response(headers=_limits(0, reset=clock.now + 45)))
+    
+    assert scheduler.acquire() is second
+    assert clock.waits == [45]
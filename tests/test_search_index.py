@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from db.search import InvertedIndex, tokenize  # noqa: E402
+
+
+def _index() -> InvertedIndex:
+    index = InvertedIndex()
+    index.add(1, {"name": "fastapi", "description": "Web framework for building APIs", "topics": ["python", "web"]})
+    index.add(2, {"name": "flask", "description": "A lightweight web framework", "summary": "Python micro framework"})
+    index.add(3, {"name": "numpy", "summary": "Array computing for Python", "tags": ["science"]})
+    return index
+
+
+def test_tokenize_handles_strings_and_lists() -> None:
+    assert tokenize("Fast-API, v2!") == ["fast", "api", "v2"]
+    assert tokenize(["Machine Learning", "ML"]) == ["machine", "learning", "ml"]
+    assert tokenize(None) == []
+
+
+def test_search_requires_every_term_and_ranks_by_weight() -> None:
+    index = _index()
+    
+    assert [repo_id for _, repo_id in index.search("web framework")] == [1, 2]
+    assert [repo_id for _, repo_id in index.search("python")][0] == 1  # topic outweighs summary
+    assert index.search("flask numpy") == []
+    assert index.search("") == []
@@ -17,12 +17,12 @@ export const getBoards = async (skip = 0, limit = 100, category = null) => {
 }
 
 export const getBoard = async (boardId) => {
-  const response = await api.get(`/boards/${boardId}`)
+  const response = await api.get(`/boards/${boardId}`, { params: { view: 'card' } })
   return response.data
 }
 
 export const getRepos = async (filters = {}) => {
-  const response = await api.get('/repos', { params: filters })
+  const response = await api.get('/repos', { params: { view: 'card', ...filters } })
   return response.data
 }
 
@@ -31,8 +31,18 @@ export const getRepo = async (repoId) => {
   return response.data
 }
 
+export const getReposBatch = async (repoIds, view = 'card') => {
+  const response = await api.get('/repos/batch', { params: { ids: repoIds.join(','), view } })
+  return response.data
+}
+
+export const getReposByName = async (fullNames, view = 'card') => {
+  const response = await api.get('/repos/by-name', { params: { full_names: fullNames.join(','), view } })
+  return response.data
+}
+
 export const searchRepos = async (query, limit = 20) => {
-  const response = await api.get('/search', { params: { q: query, limit } })
+  const response = await api.get('/search', { params: { q: query, limit, view: 'card' } })
   return response.data
 }
 